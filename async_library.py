@@ -0,0 +1,176 @@
+import asyncio
+import functools
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple
+
+from book import Book
+from library import Library
+
+
+class AsyncLibrary:
+    """
+        Асинхронный интерфейс библиотеки для asyncio.
+
+        Все обращения к библиотеке (чтение и запись файлов, сериализация,
+        поиск) выполняются в пуле потоков, поэтому цикл событий не
+        блокируется. Мутации применяются в памяти сразу, а сохраняются одним
+        фоновым сохранением через flush_delay секунд после первой мутации
+        серии. Для точки надёжности используйте await flush().
+
+        Атрибуты:
+            library (Library): Библиотека, в которой хранятся книги.
+            flush_delay (float): Задержка фонового сохранения в секундах.
+    """
+    def __init__(self, library: Library, flush_delay: float = 0.5, executor: Optional[Executor] = None):
+        """
+            Инициализация асинхронной библиотеки.
+
+            Args:
+                library (Library): Библиотека; её автосохранение отключается.
+                flush_delay (float): Задержка фонового сохранения в секундах.
+                executor (Optional[Executor]): Пул для блокирующих операций.
+                                               По умолчанию — пул цикла событий.
+        """
+        library.autosave = False
+        self.library = library
+        self.flush_delay = flush_delay
+        self._executor = executor
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_error: Optional[BaseException] = None # Ошибка последнего фонового сохранения
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+            Выполнение блокирующего вызова в пуле потоков.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def _mutate(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+            Выполнение мутации и планирование фонового сохранения.
+        """
+        result = await self._run(func, *args)
+        if self.library.unsaved and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self._delayed_flush())
+        return result
+
+    async def _delayed_flush(self) -> None:
+        """
+            Фоновое сохранение серии мутаций после задержки.
+        """
+        await asyncio.sleep(self.flush_delay)
+        self._flush_task = None # Мутации во время сохранения запланируют следующее
+        try:
+            await self._run(self.library.flush)
+            self._flush_error = None
+        except Exception as error: # Мутации остались отложенными; ошибку вернёт flush()
+            self._flush_error = error
+
+    async def flush(self) -> None:
+        """
+            Немедленное сохранение всех отложенных мутаций.
+
+            Raises:
+                Exception: Ошибка сохранения (в том числе повторная ошибка
+                    неудавшегося фонового сохранения).
+        """
+        await self._run(self.library.flush)
+        self._flush_error = None
+
+    async def close(self) -> None:
+        """
+            Сохранение отложенных мутаций и отмена фонового сохранения.
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    async def __aenter__(self) -> 'AsyncLibrary':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @property
+    def flush_error(self) -> Optional[BaseException]:
+        """
+            Ошибка последнего фонового сохранения.
+
+            Returns:
+                Optional[BaseException]: Ошибка или None, если сохранение удалось.
+        """
+        return self._flush_error
+
+    async def load_data(self) -> None:
+        """
+            Загрузка данных из файла в пуле потоков.
+        """
+        await self._run(self.library.load_data)
+
+    async def add_book(self, title: str, author: str, year: int, book_id: Optional[int] = None) -> Book:
+        """
+            Добавление книги (см. Library.add_book).
+        """
+        return await self._mutate(self.library.add_book, title, author, year, book_id)
+
+    async def reserve_ids(self, count: int) -> range:
+        """
+            Резервирование блока ID (см. Library.reserve_ids).
+        """
+        return await self._mutate(self.library.reserve_ids, count)
+
+    async def add_books(self, books: Iterable[Tuple[str, str, int]]) -> List[Book]:
+        """
+            Добавление нескольких книг (см. Library.add_books).
+        """
+        return await self._mutate(self.library.add_books, list(books))
+
+    async def update_book_status(self, book_id: int, status: str) -> bool:
+        """
+            Изменение статуса книги (см. Library.update_book_status).
+        """
+        return await self._mutate(self.library.update_book_status, book_id, status)
+
+    async def update_statuses(self, statuses: Mapping[int, str]) -> bool:
+        """
+            Изменение статусов нескольких книг (см. Library.update_statuses).
+        """
+        return await self._mutate(self.library.update_statuses, dict(statuses))
+
+    async def remove_book(self, book_id: int) -> bool:
+        """
+            Удаление книги (см. Library.remove_book).
+        """
+        return await self._mutate(self.library.remove_book, book_id)
+
+    async def remove_books(self, book_ids: Iterable[int]) -> bool:
+        """
+            Удаление нескольких книг (см. Library.remove_books).
+        """
+        return await self._mutate(self.library.remove_books, list(book_ids))
+
+    async def changes_since(self, revision: int) -> List[dict]:
+        """
+            Изменения после ревизии (см. Library.changes_since).
+        """
+        return await self._run(self.library.changes_since, revision)
+
+    async def get_book(self, book_id: int) -> Optional[Book]:
+        """
+            Поиск книги по ID (см. Library.get_book).
+        """
+        return await self._run(self.library.get_book, book_id)
+
+    async def search_books(self, data: str, field: str) -> List[Book]:
+        """
+            Поиск книг в пуле потоков; поиски выполняются параллельно друг с
+            другом и с фоновым сохранением.
+        """
+        return await self._run(self.library.search_books, data, field)
+
+    async def books(self) -> List[Book]:
+        """
+            Список книг в порядке добавления.
+        """
+        return await self._run(lambda: self.library.books)
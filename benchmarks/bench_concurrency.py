@@ -0,0 +1,91 @@
+"""
+    Бенчмарк конкурентного доступа: пропускная способность поисков в
+    зависимости от числа потоков при фоновом писателе.
+
+    Сравниваются блокировка «читатели-писатель» (Library) и одна
+    исключительная блокировка на все операции.
+
+    Запуск из корня проекта:
+        python -m benchmarks.bench_concurrency --size 100000 --threads 1 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from benchmarks.catalogue import QUERIES, build_library
+from library import Library
+from locks import ReadWriteLock
+
+
+class ExclusiveLock(ReadWriteLock):
+    """
+        Блокировка, в которой чтение исключает другие чтения.
+    """
+    @contextmanager
+    def read(self):
+        with self.write():
+            yield
+
+
+def run(library: Library, threads: int, duration: float) -> float:
+    """
+        Поиски в нескольких потоках при одном писателе, меняющем статусы.
+
+        Returns:
+            float: Поисков в секунду.
+    """
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def reader(number: int) -> None:
+        position = number
+        while not stop.is_set():
+            field, query = QUERIES[position % len(QUERIES)]
+            library.search_books(query, field)
+            position += 1
+            counts[number] += 1
+
+    def writer() -> None:
+        statuses = ["выдана", "в наличии"]
+        position = 0
+        while not stop.is_set():
+            library.update_book_status(position % 100 + 1, statuses[position % 2])
+            position += 1
+            time.sleep(0.01)
+
+    workers = [threading.Thread(target=reader, args=(number,)) for number in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100_000, help="Количество книг")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8], help="Числа потоков-читателей")
+    parser.add_argument("--duration", type=float, default=3.0, help="Длительность замера, с")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        library = build_library(args.size, file_path=os.path.join(directory, "data.json"), journal=True,
+                                search_cache_size=0) # Замеряем поиск, а не попадания в кэш
+        print(f"Каталог: {args.size} книг, писатель: журнал, 100 изменений статуса в секунду")
+        print(f"{'потоки':>7}{'RW-блокировка, поиск/с':>26}{'исключительная, поиск/с':>27}")
+        for threads in args.threads:
+            library._lock = ReadWriteLock()
+            shared = run(library, threads, args.duration)
+            library._lock = ExclusiveLock()
+            exclusive = run(library, threads, args.duration)
+            print(f"{threads:>7}{shared:>26.0f}{exclusive:>27.0f}")
+
+
+if __name__ == "__main__":
+    main()
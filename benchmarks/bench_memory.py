@@ -0,0 +1,60 @@
+"""
+    Бенчмарк памяти: Book со __slots__ против книги с __dict__.
+
+    Запуск из корня проекта:
+        python -m benchmarks.bench_memory --size 1000000
+"""
+import argparse
+import gc
+import tracemalloc
+from typing import Callable
+
+from benchmarks.catalogue import generate_records
+from book import Book
+
+
+class DictBook(Book):
+    """
+        Книга с __dict__ у каждого экземпляра (представление до __slots__).
+    """
+
+
+def measure(build: Callable[[], list]) -> int:
+    """
+        Объём памяти, выделенной при построении объектов, в байтах.
+    """
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return allocated
+
+
+def dict_book(data: dict) -> DictBook:
+    """
+        Книга с __dict__ без интернирования авторов.
+    """
+    book = DictBook(data["title"], data["author"], data["year"])
+    book.id = data["id"]
+    book.status = data["status"]
+    return book
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000, help="Количество книг")
+    args = parser.parse_args()
+
+    records = list(generate_records(args.size)) # Новые строки у каждой записи, как после json.load
+    dict_bytes = measure(lambda: [dict_book(data) for data in records])
+    slots_bytes = measure(lambda: [Book.from_dict(data) for data in records])
+    print(f"Книг: {args.size}")
+    print(f"__dict__:  {dict_bytes / 2**20:8.1f} МиБ ({dict_bytes / args.size:.0f} байт на книгу)")
+    print(f"__slots__: {slots_bytes / 2**20:8.1f} МиБ ({slots_bytes / args.size:.0f} байт на книгу)")
+    print(f"Экономия:  {1 - slots_bytes / dict_bytes:8.1%}")
+
+
+if __name__ == "__main__":
+    main()
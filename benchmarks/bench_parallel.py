@@ -0,0 +1,52 @@
+"""
+    Бенчмарк параллельного режима: построение индексов и поиск при разном
+    количестве процессов.
+
+    Для каждого количества процессов каталог загружается в Library(workers=N)
+    (ключи и триграммы частей вычисляются в процессах пула), затем
+    выполняются запросы из catalogue.QUERIES. Ускорение считается
+    относительно режима без процессов (workers=0).
+
+    Запуск из корня проекта:
+        python -m benchmarks.bench_parallel --size 1000000 --workers 0 2 4 8 16 32
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.catalogue import QUERIES, generate_books
+from library import Library
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1_000_000, help="Количество книг в каталоге")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4, 8],
+                        help="Количество процессов (0 — без параллельного режима)")
+    parser.add_argument("--repeat", type=int, default=5, help="Количество повторов каждого запроса")
+    args = parser.parse_args()
+
+    books = generate_books(args.size)
+    print(f"Каталог: {args.size} книг, ядер: {os.cpu_count()}")
+    print(f"{'процессов':>10}{'загрузка, с':>14}{'ускорение':>12}{'поиск, мс':>12}{'ускорение':>12}")
+    base_load = base_search = None
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in args.workers:
+            library = Library(file_path=os.path.join(directory, "data.json"), workers=workers, search_cache_size=0)
+            start = time.perf_counter()
+            library.books = books
+            load = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for field, query in QUERIES:
+                    library.search_books(query, field)
+            search = (time.perf_counter() - start) * 1000 / (args.repeat * len(QUERIES))
+            library.close()
+            if base_load is None:
+                base_load, base_search = load, search
+            print(f"{workers:>10}{load:>14.2f}{base_load / load:>11.1f}x{search:>12.2f}{base_search / search:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+    Бенчмарк поиска: полный перебор против триграммного индекса.
+
+    Запуск из корня проекта:
+        python -m benchmarks.bench_search --size 1000000
+"""
+import argparse
+import time
+from typing import List
+
+from benchmarks.catalogue import QUERIES, build_library
+from book import Book, search_key
+
+
+def linear_search(books: List[Book], data: str, field: str) -> List[Book]:
+    """
+        Поиск полным перебором (поведение до появления индекса): ключ каждой
+        книги вычисляется заново на каждый запрос.
+    """
+    data = search_key(data)
+    return [book for book in books if data in search_key(getattr(book, field))]
+
+
+def best_of(func, repeat: int) -> float:
+    """
+        Лучшее время из нескольких запусков, в миллисекундах.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=1_000_000, help="Количество книг в каталоге")
+    parser.add_argument("--repeat", type=int, default=3, help="Количество повторов каждого запроса")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    library = build_library(args.size, search_cache_size=0) # Замеряем индекс, а не кэш результатов
+    print(f"Каталог: {args.size} книг, построение с индексом: {time.perf_counter() - start:.1f} с")
+    books = library.books
+    print(f"{'поле':<8}{'запрос':<14}{'найдено':>10}{'перебор, мс':>14}{'индекс, мс':>14}{'ускорение':>12}")
+    for field, query in QUERIES:
+        expected = linear_search(books, query, field)
+        assert library.search_books(query, field) == expected # Результаты совпадают
+        scan = best_of(lambda: linear_search(books, query, field), args.repeat)
+        indexed = best_of(lambda: library.search_books(query, field), args.repeat)
+        print(f"{field:<8}{query:<14}{len(expected):>10}{scan:>14.2f}{indexed:>14.2f}{scan / indexed:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+    Генератор синтетических каталогов для бенчмарков.
+
+    Названия и авторы составляются из кириллических и латинских слов и имён,
+    поэтому каталог похож на реальный: авторы повторяются, названия почти
+    уникальны, годы распределены равномерно.
+"""
+import os
+import random
+import tempfile
+from typing import Any, Dict, Iterator, List
+
+from book import Book, BookStatus
+from library import Library
+
+TITLE_WORDS = ["война", "мир", "преступление", "наказание", "мастер", "маргарита", "идиот", "душа",
+               "отцы", "дети", "тихий", "дон", "белая", "гвардия", "сердце", "собачье", "герой",
+               "нашего", "времени", "горе", "от", "ума", "капитанская", "дочка", "братья",
+               "brave", "new", "world", "the", "trial", "castle", "animal", "farm", "great",
+               "expectations", "pride", "prejudice", "war", "peace", "sea", "old", "man"]
+FIRST_NAMES = ["Лев", "Фёдор", "Михаил", "Николай", "Иван", "Александр", "Антон", "Анна", "Марина",
+               "George", "Aldous", "Franz", "Jane", "Charles", "Ernest", "Virginia", "Mark"]
+LAST_NAMES = ["Толстой", "Достоевский", "Булгаков", "Гоголь", "Тургенев", "Пушкин", "Чехов",
+              "Ахматова", "Цветаева", "Orwell", "Huxley", "Kafka", "Austen", "Dickens",
+              "Hemingway", "Woolf", "Twain"]
+QUERIES = [("author", "булгаков"), ("author", "kafka"), ("title", "мастер и"),
+           ("title", "world 42"), ("year", "1866"), ("year", "19")]
+STATUSES = BookStatus.list()
+
+
+def generate_records(size: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """
+        Записи каталога в формате data.json.
+
+        Args:
+            size (int): Количество книг.
+            seed (int): Начальное значение генератора случайных чисел.
+
+        Yields:
+            Dict[str, Any]: Запись очередной книги с ID от 1 до size.
+    """
+    rng = random.Random(seed)
+    for book_id in range(1, size + 1):
+        words = rng.choices(TITLE_WORDS, k=rng.randint(1, 4))
+        yield {
+            "id": book_id,
+            "title": f"{' '.join(words).capitalize()} {book_id}",
+            "author": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "year": rng.randint(1800, 2024),
+            "status": STATUSES[rng.random() < 0.2], # Около 20% книг выдано
+        }
+
+
+def generate_books(size: int, seed: int = 42) -> List[Book]:
+    """
+        Книги синтетического каталога.
+
+        Args:
+            size (int): Количество книг.
+            seed (int): Начальное значение генератора случайных чисел.
+
+        Returns:
+            List[Book]: Книги с ID от 1 до size.
+    """
+    return [Book.from_dict(data) for data in generate_records(size, seed)]
+
+
+def build_library(size: int, seed: int = 42, **options: Any) -> Library:
+    """
+        Создание библиотеки с синтетическим каталогом без записи на диск.
+
+        По умолчанию файл библиотеки находится во временной директории,
+        поэтому служебные файлы (блокировка и т. п.) не остаются в текущей.
+
+        Args:
+            size (int): Количество книг.
+            seed (int): Начальное значение генератора случайных чисел.
+            **options: Параметры конструктора Library.
+
+        Returns:
+            Library: Заполненная библиотека.
+    """
+    if "file_path" not in options:
+        options["file_path"] = os.path.join(tempfile.mkdtemp(prefix="bench_"), "data.json")
+    library = Library(**options)
+    library.books = generate_books(size, seed)
+    return library
@@ -0,0 +1,188 @@
+"""
+    Бенчмарк горячих путей Library на синтетических каталогах.
+
+    Для каждого размера каталога измеряются add_book, remove_book,
+    update_book_status, search_books (без кэша и с кэшем результатов),
+    load_data и save_data: перцентили
+    задержки, пропускная способность и пиковая память одной операции.
+    Результаты выводятся в JSON для сравнения между версиями.
+
+    Запуск из корня проекта:
+        python -m benchmarks.harness --sizes 1000 100000 1000000 --output results.json
+        python -m benchmarks.harness --sizes 1000 --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from benchmarks.catalogue import QUERIES, build_library
+from library import Library
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+        Перцентиль отсортированного списка (ближайший ранг).
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure(name: str, size: int, operation: Callable[[int], Any], count: int) -> Dict[str, Any]:
+    """
+        Замер операции.
+
+        Операция выполняется count раз без трассировки памяти для замера
+        задержек, затем ещё раз под tracemalloc для замера пиковой памяти.
+
+        Args:
+            name (str): Название операции.
+            size (int): Размер каталога.
+            operation (Callable[[int], Any]): Операция; получает номер запуска.
+            count (int): Количество запусков.
+
+        Returns:
+            Dict[str, Any]: Результат замера.
+    """
+    timings = []
+    for number in range(count):
+        start = time.perf_counter()
+        operation(number)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    operation(count)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    timings.sort()
+    return {
+        "size": size,
+        "operation": name,
+        "count": count,
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p90_ms": percentile(timings, 0.90) * 1000,
+        "p99_ms": percentile(timings, 0.99) * 1000,
+        "max_ms": timings[-1] * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "ops_per_sec": count / sum(timings),
+        "peak_memory_bytes": peak,
+    }
+
+
+def run_size(size: int, ops: int, io_ops: int, directory: str, journal: bool) -> List[Dict[str, Any]]:
+    """
+        Замер всех операций на каталоге одного размера.
+
+        Args:
+            size (int): Размер каталога.
+            ops (int): Количество запусков поиска.
+            io_ops (int): Количество запусков операций с записью или чтением файла.
+            directory (str): Каталог для файлов данных.
+            journal (bool): Использовать режим журнала.
+
+        Returns:
+            List[Dict[str, Any]]: Результаты замеров.
+    """
+    file_path = os.path.join(directory, f"data_{size}.json")
+    library = build_library(size, file_path=file_path, journal=journal, search_cache_size=0)
+    rng = random.Random(size)
+    results = [measure("save_data", size, lambda _: library.save_data(), io_ops)]
+    loaded = Library(file_path=file_path, journal=journal)
+    results.append(measure("load_data", size, lambda _: loaded.load_data(), io_ops))
+
+    def search(number: int) -> None:
+        field, query = QUERIES[number % len(QUERIES)]
+        library.search_books(query, field)
+
+    results.append(measure("search_books", size, search, ops))
+    library.search_cache.max_size = len(QUERIES) # Повторные запросы без изменений между ними
+    results.append(measure("search_books_cached", size, search, ops))
+    library.search_cache.max_size = 0
+    library.search_cache.clear()
+    added: List[int] = []
+    results.append(measure("add_book", size,
+                           lambda number: added.append(library.add_book(f"Новая книга {number}", "Автор", 2024).id),
+                           io_ops))
+    statuses = ["выдана", "в наличии"]
+    results.append(measure("update_book_status", size,
+                           lambda number: library.update_book_status(rng.randint(1, size), statuses[number % 2]),
+                           io_ops))
+    results.append(measure("remove_book", size, lambda number: library.remove_book(added[number]), io_ops))
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[str]:
+    """
+        Сравнение с базовыми результатами по медианной задержке.
+
+        Args:
+            results (List[Dict[str, Any]]): Текущие результаты.
+            baseline_path (str): Путь к JSON с базовыми результатами.
+            threshold (float): Допустимый рост медианы (0.2 — на 20%).
+
+        Returns:
+            List[str]: Описания регрессий.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {(item["size"], item["operation"]): item for item in json.load(file)["results"]}
+    regressions = []
+    for item in results:
+        old = baseline.get((item["size"], item["operation"]))
+        if old is not None and item["p50_ms"] > old["p50_ms"] * (1 + threshold):
+            regressions.append(f"{item['operation']} на {item['size']} книгах: "
+                               f"p50 {old['p50_ms']:.3f} -> {item['p50_ms']:.3f} мс")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000],
+                        help="Размеры каталога")
+    parser.add_argument("--ops", type=int, default=200, help="Количество запусков поиска")
+    parser.add_argument("--io-ops", type=int, default=20,
+                        help="Количество запусков операций с файлом (мутации, load_data, save_data)")
+    parser.add_argument("--journal", action="store_true", help="Мутации в режиме журнала")
+    parser.add_argument("--output", help="Файл для результатов в JSON (по умолчанию stdout)")
+    parser.add_argument("--baseline", help="JSON с результатами предыдущей версии для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимый рост медианной задержки")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            for item in run_size(size, args.ops, args.io_ops, directory, args.journal):
+                results.append(item)
+                print(f"{size:>9} {item['operation']:<20} p50 {item['p50_ms']:10.3f} мс  "
+                      f"p99 {item['p99_ms']:10.3f} мс  {item['ops_per_sec']:12.1f} оп/с  "
+                      f"пик {item['peak_memory_bytes'] / 2**20:8.1f} МиБ", file=sys.stderr)
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "journal": args.journal,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=4)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        print(text)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for regression in regressions:
+            print(f"Регрессия: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,29 @@
+import sys
+import unicodedata
 from typing import Any, Optional, List
 
 from enum import Enum
 
+
+def search_key(value: Any) -> str:
+    """
+        Ключ поиска: значение, приведённое к единому виду для сравнения без
+        учёта регистра.
+
+        Строка нормализуется по NFKC, регистр сворачивается через casefold
+        (корректно для кириллицы и, например, немецкой ß), буква "ё"
+        заменяется на "е". Ключи книг вычисляются один раз при добавлении
+        книги в индекс, ключ запроса — один раз на запрос.
+
+        Args:
+            value (Any): Значение поля или запрос.
+
+        Returns:
+            str: Ключ поиска.
+    """
+    key = unicodedata.normalize("NFKC", str(value)).casefold()
+    return unicodedata.normalize("NFKC", key).replace("ё", "е")
+
 class BookStatus(Enum):
     """
         Перечисление для статусов книги.
@@ -32,7 +54,11 @@ class Book:
             _id (Optional[int]): Уникальный идентификатор книги (задаётся автоматически).
             _status (BookStatus): Статус книги (по умолчанию AVAILABLE).
 
+        Атрибуты хранятся в __slots__, без словаря __dict__ у каждого экземпляра,
+        чтобы большой каталог занимал меньше памяти.
     """
+    __slots__ = ("_id", "_status", "title", "author", "year")
+
     def __init__(self, title: str, author: str, year: int):
         self._id: Optional[int] = None 
         self._status = BookStatus.AVAILABLE
@@ -139,7 +165,10 @@ class Book:
                 KeyError: Если в словаре отсутствуют обязательные ключи.
                 ValueError: Если данные содержат некорректные значения.
         """
-        book = Book(data["title"], data["author"], data["year"])
+        author = data["author"]
+        if isinstance(author, str):
+            author = sys.intern(author) # Одна строка на автора для всех его книг
+        book = Book(data["title"], author, data["year"])
         book.id = data.get("id") # Устанавливаем ID, если он есть
         book.status = data.get("status", BookStatus.AVAILABLE.value) # Устанавливаем статус
         return book
\ No newline at end of file
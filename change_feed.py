@@ -0,0 +1,228 @@
+import itertools
+import json
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, List, Optional
+
+
+class ChangeFeed:
+    """
+        Лента изменений библиотеки ограниченного размера.
+
+        Каждое изменение (добавление, удаление книги, изменение статуса)
+        получает следующий номер ревизии. Хранятся последние max_size
+        изменений, поэтому потребитель, знающий номер ревизии своей копии
+        каталога, получает только изменения после неё, а не весь каталог.
+        Если нужные изменения уже вытеснены или история прервана (например,
+        данные перечитаны из файла, изменённого другим процессом), since
+        сообщает об этом, и потребителю нужна полная синхронизация.
+
+        Если задан путь к файлу, изменения дописываются в него строками JSON
+        и восстанавливаются при создании ленты, так что история переживает
+        перезапуск процесса. Файл могут разделять несколько экземпляров
+        библиотеки с одним файлом данных: sync, append и reset вызываются
+        под блокировкой файла данных и сначала дочитывают записи других
+        экземпляров, поэтому номера ревизий не повторяются. Оборванная при
+        сбое последняя строка обрезается. Номер ревизии хранится и вместе с
+        данными (см. Library), поэтому без файла ленты ревизии после
+        перезапуска продолжаются, а не начинаются заново.
+
+        Атрибуты:
+            max_size (int): Максимальное количество хранимых изменений.
+            path (Optional[str]): Путь к файлу ленты или None.
+            revision (int): Номер последней ревизии (0 — изменений не было).
+    """
+    def __init__(self, max_size: int = 10000, path: Optional[str] = None):
+        """
+            Инициализация ленты (при заданном файле — чтение его записей).
+
+            Args:
+                max_size (int): Максимальное количество хранимых изменений.
+                path (Optional[str]): Путь к файлу ленты.
+        """
+        self.max_size = max_size
+        self.path = path
+        self.revision = 0
+        self._start = 0 # Изменения после этой ревизии известны полностью
+        self._changes: Deque[dict[str, Any]] = deque(maxlen=max_size) # Ревизии _start+1 .. revision
+        self._lines = 0 # Количество строк в файле ленты
+        self._offset = 0 # Прочитанная часть файла ленты в байтах
+        self._inode: Optional[int] = None # Файл, из которого прочитана лента (меняется при перезаписи)
+        self._lock = threading.Lock() # Чтение ленты параллельно с записью
+        self._sync(repair=False)
+
+    def _sync(self, repair: bool) -> None:
+        """
+            Дочитывание записей, добавленных в файл ленты (в том числе другими
+            экземплярами), с места последнего чтения.
+
+            Args:
+                repair (bool): Обрезать оборванную последнюю строку. Можно
+                    только под блокировкой файла данных: без неё строку,
+                    возможно, ещё дописывает другой экземпляр.
+        """
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r+b" if repair else "rb") as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_ino != self._inode or stat.st_size < self._offset: # Файл перезаписан — читаем заново
+                    self._changes.clear()
+                    self._start = self.revision = self._lines = self._offset = 0
+                    self._inode = stat.st_ino
+                file.seek(self._offset)
+                for line in file:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("Строка без перевода строки")
+                        change = json.loads(line)
+                    except ValueError: # В том числе json.JSONDecodeError и ошибки UTF-8
+                        if repair:
+                            file.truncate(self._offset) # Недописанная запись — дальше читать нечего
+                        break
+                    self._offset += len(line)
+                    self._lines += 1
+                    if change["op"] == "reset":
+                        self._changes.clear()
+                        self._start = self.revision = change["revision"]
+                    else:
+                        self._push(change)
+        except FileNotFoundError:
+            return
+
+    def _push(self, change: dict[str, Any]) -> None:
+        """
+            Добавление изменения в память (самое старое вытесняется).
+        """
+        if len(self._changes) == self.max_size:
+            self._start = self._changes[0]["revision"] if self._changes else change["revision"]
+        self._changes.append(change)
+        self.revision = change["revision"]
+
+    def _write(self, changes: List[dict[str, Any]]) -> None:
+        """
+            Дописывание записей в файл ленты (до изменения ленты в памяти).
+        """
+        if self.path is None:
+            return
+        path = Path(self.path) # Создаём директорию, если её нет
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = "".join(json.dumps(change, ensure_ascii=False) + "\n" for change in changes).encode("utf-8")
+        with open(self.path, "ab") as file:
+            file.write(data)
+            self._inode = os.fstat(file.fileno()).st_ino
+        self._offset += len(data)
+        self._lines += len(changes)
+
+    def _compact(self) -> None:
+        """
+            Перезапись файла ленты (атомарно) только с хранимыми изменениями,
+            когда он становится вдвое больше ленты.
+        """
+        if self.path is None or self._lines <= 2 * max(self.max_size, 1):
+            return
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        changes = [{"revision": self._start, "op": "reset"}, *self._changes]
+        data = "".join(json.dumps(change, ensure_ascii=False) + "\n" for change in changes).encode("utf-8")
+        with open(temp_path, "wb") as file:
+            file.write(data)
+            inode = os.fstat(file.fileno()).st_ino
+        os.replace(temp_path, self.path)
+        self._inode, self._offset, self._lines = inode, len(data), len(changes)
+
+    def sync(self) -> int:
+        """
+            Дочитывание записей других экземпляров из файла ленты (под
+            блокировкой файла данных).
+
+            Returns:
+                int: Номер последней ревизии.
+        """
+        with self._lock:
+            self._sync(repair=True)
+            return self.revision
+
+    def append(self, changes: List[dict[str, Any]]) -> int:
+        """
+            Запись изменений в ленту (под блокировкой файла данных).
+
+            Изменения попадают в ленту в памяти только после записи в файл.
+
+            Args:
+                changes (List[dict[str, Any]]): Изменения: номер ревизии
+                    ("revision", следующие по порядку после sync), поле "op" и
+                    данные изменения (как в журнале).
+
+            Returns:
+                int: Номер ревизии после последнего изменения.
+
+            Raises:
+                OSError: Если файл ленты не удалось записать (лента не меняется).
+                ValueError: Если номера ревизий не продолжают ленту.
+        """
+        with self._lock:
+            self._sync(repair=True)
+            if changes and changes[0]["revision"] != self.revision + 1:
+                raise ValueError(f"Ревизия {changes[0]['revision']} не продолжает ленту "
+                                 f"(последняя ревизия {self.revision})")
+            self._write(changes)
+            for change in changes:
+                self._push(change)
+            self._compact()
+            return self.revision
+
+    def reset(self, revision: int = 0) -> int:
+        """
+            Прерывание истории (под блокировкой файла данных): данные
+            изменились не через ленту (например, перечитаны из файла), и все
+            потребители должны синхронизироваться полностью.
+
+            История в памяти прерывается, даже если файл ленты не удалось
+            записать.
+
+            Args:
+                revision (int): Ревизия данных: новый номер ревизии не меньше
+                    неё (и больше текущего).
+
+            Returns:
+                int: Новый номер ревизии.
+
+            Raises:
+                OSError: Если прерывание не удалось записать в файл ленты.
+        """
+        with self._lock:
+            try:
+                self._sync(repair=True)
+            finally:
+                self.revision = max(self.revision + 1, revision)
+                self._start = self.revision
+                self._changes.clear()
+            self._write([{"revision": self.revision, "op": "reset"}])
+            return self.revision
+
+    def since(self, revision: int) -> List[dict[str, Any]]:
+        """
+            Изменения после ревизии.
+
+            Args:
+                revision (int): Номер ревизии, до которой изменения у
+                    потребителя уже есть.
+
+            Returns:
+                List[dict[str, Any]]: Изменения по порядку: "revision", "op"
+                    ("add", "status" или "remove") и данные изменения.
+
+            Raises:
+                ValueError: Если изменения после ревизии недоступны (история
+                    вытеснена или прервана, либо ревизия из будущего) — нужна
+                    полная синхронизация.
+        """
+        with self._lock:
+            self._sync(repair=False) # Записи других экземпляров с тем же файлом
+            if not self._start <= revision <= self.revision:
+                raise ValueError(f"Изменения после ревизии {revision} недоступны "
+                                 f"(доступны после ревизий {self._start}..{self.revision}), "
+                                 f"нужна полная синхронизация")
+            return list(itertools.islice(self._changes, revision - self._start, None))
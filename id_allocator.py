@@ -0,0 +1,64 @@
+import os
+from pathlib import Path
+
+from storage import StorageFormatError
+
+
+class IdAllocator:
+    """
+        Граница выданных ID книг в отдельном файле (data.json.ids).
+
+        Экземпляр библиотеки с отложенным сохранением (autosave=False) выдаёт
+        ID книгам и блокам reserve_ids до того, как они попадут в файл
+        данных. Чтобы другой процесс не выдал те же ID раньше, граница
+        записывается в этот файл сразу; все экземпляры выдают ID не меньше
+        неё. Файл читается и записывается под блокировкой файла данных и
+        заменяется атомарно.
+
+        Атрибуты:
+            path (str): Путь к файлу.
+    """
+    def __init__(self, path: str):
+        """
+            Инициализация с путём к файлу.
+
+            Args:
+                path (str): Путь к файлу.
+        """
+        self.path = path
+
+    def read(self) -> int:
+        """
+            Чтение границы.
+
+            Returns:
+                int: Следующий ID, ещё не выданный ни одним экземпляром
+                    (1, если файла нет).
+
+            Raises:
+                StorageFormatError: Если файл повреждён.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return 1
+        try:
+            return int(data)
+        except ValueError as error:
+            raise StorageFormatError(f"Некорректный файл ID {self.path}: {data[:20]!r}") from error
+
+    def claim(self, next_id: int) -> None:
+        """
+            Сдвиг границы до next_id (граница не уменьшается).
+
+            Args:
+                next_id (int): Следующий ID после выданных.
+        """
+        if next_id <= self.read():
+            return
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True) # Создаём директорию, если её нет
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(str(next_id))
+        os.replace(temp_path, self.path)
@@ -0,0 +1,240 @@
+import bisect
+import cProfile
+import functools
+import pstats
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Верхние границы корзин гистограммы времени: от 1 мкс до ~17 с, удвоение
+_BOUNDS = [2 ** power / 1_000_000 for power in range(25)]
+
+
+class Histogram:
+    """
+        Гистограмма длительностей с логарифмическими корзинами.
+
+        Атрибуты:
+            count (int): Количество значений.
+            total (float): Сумма значений.
+            min (float): Минимальное значение.
+            max (float): Максимальное значение.
+    """
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self._buckets = [0] * (len(_BOUNDS) + 1) # Последняя корзина — больше всех границ
+
+    def add(self, value: float) -> None:
+        """
+            Добавление значения.
+
+            Args:
+                value (float): Длительность в секундах.
+        """
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self._buckets[bisect.bisect_left(_BOUNDS, value)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """
+            Оценка перцентиля по корзинам (верхняя граница корзины).
+
+            Args:
+                fraction (float): Доля от 0 до 1.
+
+            Returns:
+                float: Оценка перцентиля в секундах.
+        """
+        rank = fraction * self.count
+        seen = 0
+        for number, bucket in enumerate(self._buckets):
+            seen += bucket
+            if seen >= rank and bucket:
+                return min(_BOUNDS[number], self.max) if number < len(_BOUNDS) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+            Сводка гистограммы.
+
+            Returns:
+                Dict[str, Any]: Количество, сумма, минимум, максимум, перцентили
+                    и непустые корзины (верхняя граница -> количество).
+        """
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.50),
+            "p90": self.percentile(0.90),
+            "p99": self.percentile(0.99),
+            "buckets": {(_BOUNDS[number] if number < len(_BOUNDS) else "inf"): bucket
+                        for number, bucket in enumerate(self._buckets) if bucket},
+        }
+
+
+class Instrumentation:
+    """
+        Сбор статистики горячих путей библиотеки.
+
+        Для каждой операции считаются вызовы и ошибки, строится гистограмма
+        длительности и суммируются числовые поля, которые операция сообщает
+        через note (например, записанные байты или просмотренные книги).
+        Поля с суффиксом "_seconds" попадают в отдельные гистограммы.
+        Каждое событие можно передать во внешний приёмник (sink), а с
+        profile=True каждая внешняя операция выполняется под cProfile.
+
+        Атрибуты:
+            sink (Optional[Callable[[Dict[str, Any]], None]]): Приёмник событий.
+            profile (bool): Профилировать ли операции через cProfile.
+    """
+    def __init__(self, sink: Optional[Callable[[Dict[str, Any]], None]] = None, profile: bool = False):
+        """
+            Инициализация сборщика статистики.
+
+            Args:
+                sink (Optional[Callable[[Dict[str, Any]], None]]): Приёмник событий;
+                    вызывается после каждой операции со словарём
+                    {"operation": ..., "duration": ..., "error": ..., <поля операции>}.
+                profile (bool): Профилировать операции через cProfile.
+        """
+        self.sink = sink
+        self.profile = profile
+        self._lock = threading.Lock()
+        self._local = threading.local() # Стек событий текущего потока
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._profile_stats: Optional[pstats.Stats] = None
+
+    def _events(self) -> List[Dict[str, Any]]:
+        events = getattr(self._local, "events", None)
+        if events is None:
+            events = self._local.events = []
+        return events
+
+    def note(self, **fields: Any) -> None:
+        """
+            Добавление полей к текущему событию потока.
+
+            Args:
+                **fields: Поля события (числа суммируются в счётчиках).
+        """
+        events = self._events()
+        if events:
+            events[-1].update(fields)
+
+    def call(self, name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+            Выполнение операции с замером.
+
+            Args:
+                name (str): Название операции.
+                func (Callable[..., Any]): Операция.
+                *args, **kwargs: Аргументы операции.
+
+            Returns:
+                Any: Результат операции.
+        """
+        events = self._events()
+        event: Dict[str, Any] = {}
+        profiler = cProfile.Profile() if self.profile and not events else None # Только внешние операции
+        events.append(event)
+        error = None
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                return profiler.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        except BaseException as exception:
+            error = type(exception).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            events.pop()
+            self._record(name, duration, error, event, profiler)
+
+    def _record(self, name: str, duration: float, error: Optional[str], event: Dict[str, Any],
+                profiler: Optional[cProfile.Profile]) -> None:
+        """
+            Учёт завершённой операции.
+        """
+        with self._lock:
+            counters = self._counters.setdefault(name, {"calls": 0, "errors": 0})
+            counters["calls"] += 1
+            if error is not None:
+                counters["errors"] += 1
+            self._histograms.setdefault(name, Histogram()).add(duration)
+            for key, value in event.items():
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                if key.endswith("_seconds"):
+                    self._histograms.setdefault(f"{name}.{key}", Histogram()).add(value)
+                else:
+                    counters[key] = counters.get(key, 0) + value
+            if profiler is not None:
+                if self._profile_stats is None:
+                    self._profile_stats = pstats.Stats(profiler)
+                else:
+                    self._profile_stats.add(profiler)
+        if self.sink is not None:
+            self.sink({"operation": name, "duration": duration, "error": error, **event})
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+            Снимок статистики.
+
+            Returns:
+                Dict[str, Any]: {"counters": {операция: {счётчик: значение}},
+                    "histograms": {операция или операция.поле: сводка гистограммы}}.
+        """
+        with self._lock:
+            return {
+                "counters": {name: dict(counters) for name, counters in self._counters.items()},
+                "histograms": {name: histogram.snapshot() for name, histogram in self._histograms.items()},
+            }
+
+    def profile_stats(self) -> Optional[pstats.Stats]:
+        """
+            Накопленный профиль cProfile (при profile=True).
+
+            Returns:
+                Optional[pstats.Stats]: Профиль или None, если профилирование не велось.
+        """
+        with self._lock:
+            return self._profile_stats
+
+    def reset(self) -> None:
+        """
+            Сброс всей статистики.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._profile_stats = None
+
+
+def instrumented(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """
+        Декоратор метода библиотеки, замеряющий его при включённой статистике.
+
+        Если у объекта нет сборщика (instrumentation is None), метод вызывается
+        напрямую: цена — одна проверка атрибута.
+
+        Args:
+            name (str): Название операции.
+    """
+    def decorator(method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            instrumentation = self.instrumentation
+            if instrumentation is None:
+                return method(self, *args, **kwargs)
+            return instrumentation.call(name, method, self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,129 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator, List
+
+
+class Journal:
+    """
+        Журнал изменений библиотеки (write-ahead log).
+
+        Каждая мутация дописывается в конец файла одной строкой JSON, поэтому
+        стоимость записи не зависит от размера каталога. Журнал применяется
+        поверх снимка (data.json) при загрузке и очищается при компактизации.
+        Оборванная при сбое последняя строка обрезается (при чтении или перед
+        следующей записью), чтобы новые записи не склеивались с ней.
+
+        Атрибуты:
+            path (str): Путь к файлу журнала.
+            size (int): Количество записей в журнале с момента последней компактизации.
+    """
+    def __init__(self, path: str):
+        """
+            Инициализация журнала.
+
+            Args:
+                path (str): Путь к файлу журнала.
+        """
+        self.path = path
+        self.size = 0
+
+    def append(self, records: List[dict[str, Any]]) -> int:
+        """
+            Дописывание записей в конец журнала.
+
+            Все записи попадают в файл одним вызовом write. Если файл
+            заканчивается оборванной строкой, она сначала обрезается.
+
+            Args:
+                records (List[dict[str, Any]]): Записи о мутациях.
+
+            Returns:
+                int: Количество записанных байт.
+        """
+        if not records:
+            return 0
+        path = Path(self.path) # Создаём директорию, если её нет
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        with open(self.path, "a+b") as file:
+            self._repair(file)
+            file.write(lines)
+        self.size += len(records)
+        return len(lines)
+
+    @staticmethod
+    def _repair(file: BinaryIO) -> None:
+        """
+            Обрезка оборванной последней строки (сбой во время записи).
+
+            Args:
+                file (BinaryIO): Файл журнала, открытый на чтение и запись.
+        """
+        end = file.seek(0, os.SEEK_END)
+        if not end:
+            return
+        file.seek(end - 1)
+        if file.read(1) == b"\n":
+            return
+        position = end
+        while position > 0: # Ищем конец последней целой строки с конца файла
+            step = min(position, 1 << 16)
+            position -= step
+            file.seek(position)
+            newline = file.read(step).rfind(b"\n")
+            if newline >= 0:
+                file.truncate(position + newline + 1)
+                return
+        file.truncate(0)
+
+    def has_records(self) -> bool:
+        """
+            Проверка, есть ли в файле журнала записи.
+
+            Returns:
+                bool: True, если файл журнала существует и не пуст.
+        """
+        try:
+            return os.path.getsize(self.path) > 0
+        except OSError:
+            return False
+
+    def replay(self) -> Iterator[dict[str, Any]]:
+        """
+            Чтение записей журнала по порядку.
+
+            Оборванная последняя строка (сбой во время записи) не применяется
+            и обрезается, чтобы следующие записи не склеивались с ней.
+
+            Yields:
+                dict[str, Any]: Очередная запись журнала.
+        """
+        self.size = 0
+        valid = 0 # Конец последней целой записи в байтах
+        try:
+            with open(self.path, "r+b") as file:
+                for line in file:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("Строка без перевода строки")
+                        record = json.loads(line)
+                    except ValueError: # В том числе json.JSONDecodeError и ошибки UTF-8
+                        file.truncate(valid) # Недописанная запись — дальше читать нечего
+                        break
+                    valid += len(line)
+                    self.size += 1
+                    yield record
+        except FileNotFoundError:
+            return
+
+    def truncate(self) -> None:
+        """
+            Очистка журнала после записи снимка.
+        """
+        try:
+            with open(self.path, "w", encoding="utf-8"):
+                pass
+        except FileNotFoundError:
+            pass
+        self.size = 0
@@ -0,0 +1,136 @@
+import json
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+from book import Book
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(file: TextIO, chunk_size: int = 1 << 16, array_key: str = "books",
+                    meta: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+        Потоковый разбор JSON-массива верхнего уровня по одному элементу.
+
+        Файл читается частями по chunk_size символов, поэтому в памяти
+        находится только текущая часть файла и очередной элемент, а не всё
+        дерево JSON целиком. Если верхний уровень — объект, элементы берутся
+        из массива под ключом array_key, а остальные ключи объекта (они
+        небольшие) разбираются целиком и записываются в meta.
+
+        Args:
+            file (TextIO): Открытый текстовый файл.
+            chunk_size (int): Размер читаемой части файла в символах.
+            array_key (str): Ключ массива, если верхний уровень — объект.
+            meta (Optional[Dict[str, Any]]): Сюда записываются остальные ключи объекта.
+
+        Yields:
+            Any: Очередной элемент массива.
+
+        Raises:
+            json.JSONDecodeError: Если файл не является JSON-массивом или
+                объектом с массивом под ключом array_key.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        """Дочитывание следующей части файла; False, если файл закончился."""
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk # Отбрасываем уже разобранную часть
+        pos = 0
+        return True
+
+    def skip_whitespace() -> str:
+        """Пропуск пробелов; возвращает следующий символ или "" в конце файла."""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                return ""
+
+    def decode() -> Any:
+        """Разбор очередного значения JSON с дочитыванием файла."""
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof or not fill(): # Значение оборвано не границей части, а концом файла
+                    raise
+                continue
+            if end == len(buffer) and not eof and fill(): # Число могло быть разрезано границей части
+                continue
+            pos = end
+            return value
+
+    def expect(chars: str) -> str:
+        """Пропуск пробелов и проверка следующего символа."""
+        nonlocal pos
+        char = skip_whitespace()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Ожидался один из символов {chars!r}", buffer, pos)
+        pos += 1
+        return char
+
+    def array() -> Iterator[Any]:
+        """Элементы массива, начинающегося в текущей позиции."""
+        expect("[")
+        if skip_whitespace() == "]":
+            expect("]")
+            return
+        while True:
+            skip_whitespace()
+            yield decode()
+            if expect(",]") == "]":
+                return
+
+    if skip_whitespace() != "{": # Массив верхнего уровня (формат до появления объекта)
+        yield from array()
+        return
+    expect("{")
+    if skip_whitespace() == "}":
+        raise json.JSONDecodeError(f"Ожидался ключ {array_key!r}", buffer, pos)
+    found = False
+    while True:
+        skip_whitespace()
+        key = decode()
+        expect(":")
+        skip_whitespace()
+        if key == array_key:
+            found = True
+            yield from array()
+        else:
+            value = decode()
+            if meta is not None:
+                meta[key] = value
+        if expect(",}") == "}":
+            break
+    if not found:
+        raise json.JSONDecodeError(f"Ожидался ключ {array_key!r}", buffer, pos)
+
+
+def iter_books(file_path: str, chunk_size: int = 1 << 16, meta: Optional[Dict[str, Any]] = None) -> Iterator[Book]:
+    """
+        Потоковая загрузка книг из файла в формате data.json.
+
+        Args:
+            file_path (str): Путь к файлу с данными библиотеки.
+            chunk_size (int): Размер читаемой части файла в символах.
+            meta (Optional[Dict[str, Any]]): Сюда записываются остальные поля
+                файла (например, "next_id"); они известны после чтения всех книг.
+
+        Yields:
+            Book: Очередная книга из файла.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        for data in iter_json_array(file, chunk_size, meta=meta):
+            yield Book.from_dict(data)
@@ -1,8 +1,31 @@
-import json
+import bisect
+import itertools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from book import Book, BookStatus, search_key
+from change_feed import ChangeFeed
+from id_allocator import IdAllocator
+from instrumentation import Instrumentation, instrumented
+from journal import Journal
+from locks import FileLock, ReadWriteLock
+from ngram_index import NgramIndex
+from parallel import ShardPool
+from query import Query
+from search_cache import SearchCache
+from storage import JsonStorage, Storage, StorageFormatError
+from value_index import ValueIndex
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ("title", "author", "year") # Поля книги с индексом для поиска
 
-from book import Book, BookStatus
 
 class Library:
     """ 
@@ -11,50 +34,931 @@ class Library:
         Атрибуты:
             file_path (str): Путь к файлу с данными библиотеки.
             books (List[Book]): Список книг в библиотеке.
+            journal (Optional[Journal]): Журнал изменений, если включён режим журнала.
+            compact_every (int): Количество записей журнала, после которого
+                                 выполняется компактизация.
+            lazy (bool): Ленивый режим: книги читаются из файла потоково по мере
+                         обращения к ним.
+            storage (Storage): Формат файла с данными библиотеки.
+            autosave (bool): Сохранять ли каждую мутацию сразу; иначе мутации
+                             копятся до вызова flush.
+            instrumentation (Optional[Instrumentation]): Сборщик статистики
+                             горячих путей или None (статистика выключена).
+            search_cache (SearchCache): Кэш результатов search_books.
+            workers (int): Количество процессов параллельного режима (0 — выключен).
+            change_feed (ChangeFeed): Лента сохранённых изменений для
+                             инкрементальной синхронизации (changes_since).
+
+        Библиотека потокобезопасна: поиски и чтение выполняются параллельно,
+        изменения — по одному. Изменения из разных процессов упорядочиваются
+        блокировкой файла "<file_path>.lock": перед изменением библиотека
+        перечитывает данные, если их записал другой процесс. Снимок
+        записывается во временный файл и атомарно подменяет старый.
     """
-    def __init__(self, file_path: str = "data.json"):
+    def __init__(self, file_path: str = "data.json", journal: bool = False, compact_every: int = 1000,
+                 lazy: bool = False, storage: Optional[Storage] = None, autosave: bool = True,
+                 instrumentation: Optional[Instrumentation] = None, search_cache_size: int = 256,
+                 workers: int = 0, change_feed_size: int = 10000, change_feed_path: Optional[str] = None):
         """Инициализация библиотеки с файлом.
 
         Args:
             file_path (str): Путь к файлу для загрузки/сохранения данных библиотеки. 
                              По умолчанию "data.json".
+            journal (bool): Режим журнала: мутации дописываются в файл
+                            "<file_path>.journal" вместо перезаписи всего файла.
+            compact_every (int): Количество записей журнала до компактизации.
+            lazy (bool): Ленивый режим: load_data не читает файл целиком, а
+                         iter_books и iter_search_books отдают книги, пока файл
+                         ещё дочитывается. Остальные методы дочитывают файл до конца.
+            storage (Optional[Storage]): Формат файла с данными. По умолчанию
+                                         JSON (JsonStorage).
+            autosave (bool): Сохранять каждую мутацию сразу. Если False, мутации
+                             применяются в памяти и сохраняются вызовом flush.
+            instrumentation (Optional[Instrumentation]): Сборщик статистики
+                             load_data, save_data, search_books и мутаций.
+                             По умолчанию выключен.
+            search_cache_size (int): Количество запросов в кэше результатов
+                             search_books (0 — без кэша).
+            workers (int): Параллельный режим для больших каталогов: при
+                             загрузке каталог делится на workers частей, ключи и
+                             триграммы частей вычисляются в отдельных процессах,
+                             и поиски по title/author/year выполняются в них
+                             параллельно. После изменений поиск выполняется в
+                             этом процессе до следующей загрузки или reshard().
+                             Триграммы этого процесса строятся только при
+                             первом изменении или поиске без пула.
+                             0 или 1 — параллельный режим выключен.
+            change_feed_size (int): Количество последних изменений в ленте
+                             изменений (см. changes_since).
+            change_feed_path (Optional[str]): Файл ленты изменений: номер
+                             ревизии и история переживают перезапуск.
+                             По умолчанию лента хранится только в памяти.
         """
         
-        self.books: List[Book] = []
+        self._books: Dict[int, Book] = {} # Индекс книг по ID (в порядке добавления)
+        self._search_index = {field: NgramIndex() for field in SEARCH_FIELDS} # Триграммы по полям поиска
+        self._search_deferred = False # Триграммы есть только в процессах пула (см. _search_indexes)
+        self._search_building = threading.Lock() # Отложенное построение триграмм из потоков-читателей
+        self._title_index = ValueIndex() # Точное название -> ID книг
+        self._status_index = ValueIndex() # Статус -> ID книг
+        self._year_index = ValueIndex(ordered=True) # Год -> ID книг и годы по возрастанию
         self.file_path = file_path 
+        self.journal: Optional[Journal] = Journal(file_path + ".journal") if journal else None
+        self.compact_every = compact_every
+        self.lazy = lazy
+        self.storage: Storage = storage if storage is not None else JsonStorage()
+        self._pending: Optional[Iterator[Book]] = None # Недочитанные книги ленивого режима
+        self._load_error: Optional[StorageFormatError] = None # Файл повреждён: сохранять поверх него нельзя
+        self._next_id = 1 # Следующий свободный ID; не уменьшается, ID удалённых книг не выдаются повторно
+        self._ids = IdAllocator(file_path + ".ids") # Граница ID, выданных несохранённым мутациям
+        self._reserved: List[List[int]] = [] # Незанятые блоки ID из reserve_ids: [начало, конец) по возрастанию
+        self._batch_depth = 0 # Глубина вложенности batch()
+        self._batch_records: List[dict[str, Any]] = [] # Мутации текущего пакета
+        self._undo: List[tuple] = [] # Действия для отката текущего пакета
+        self._undo_order: Optional[List[int]] = None # Порядок книг до первого удаления в пакете
+        self.autosave = autosave
+        self._unsaved: List[dict[str, Any]] = [] # Несохранённые мутации при autosave=False
+        self._lock = ReadWriteLock() # Поиски параллельно, мутации по одной
+        self._writer = threading.RLock() # Писатели этого процесса по одному
+        self._file_lock = FileLock(file_path + ".lock") # Писатели разных процессов по одному
+        self._write_depth = 0 # Глубина вложенности _writing()
+        self._file_stamp: Optional[tuple] = None # Состояние файлов после последней загрузки/записи
+        self.instrumentation = instrumentation
+        self.search_cache = SearchCache(search_cache_size)
+        self._generation = 0 # Меняется при добавлении и удалении книг
+        self._status_generation = 0 # Меняется при изменении статусов
+        self.workers = workers
+        self._shards: Optional[ShardPool] = ShardPool(workers) if workers > 1 else None
+        self._shards_generation: Optional[int] = None # Поколение данных, разделённых между процессами
+        self.change_feed = ChangeFeed(change_feed_size, change_feed_path)
+
+    @property
+    def books(self) -> List[Book]:
+        """
+            Возвращение списка книг в порядке добавления.
+
+            Returns:
+                List[Book]: Список книг в библиотеке.
+        """
+        self._ensure_loaded()
+        with self._lock.read():
+            return list(self._books.values())
+
+    @books.setter
+    def books(self, books: List[Book]) -> None:
+        """
+            Замена всех книг библиотеки с перестроением индекса.
+
+            История ленты изменений прерывается: потребителям нужна полная
+            синхронизация.
+
+            Args:
+                books (List[Book]): Новый список книг.
+        """
+        self._replace(books)
+        self._load_error = None # Книги заданы явно — их можно сохранить поверх повреждённого файла
+        with self._exclusive(): # Ревизии ленты выдаются под блокировкой файла данных
+            self._break_feed()
+
+    def _replace(self, books: List[Book]) -> None:
+        """
+            Замена всех книг с перестроением индекса (без записи в ленту изменений).
+
+            Args:
+                books (List[Book]): Новый список книг.
+        """
+        with self._lock.write():
+            self._pending = None
+            self._books = {}
+            self._generation += 1
+            self._search_deferred = False
+            for index in (*self._search_index.values(), self._title_index, self._status_index, self._year_index):
+                index.clear()
+            if self._shards is not None and books: # Триграммы частей строятся в процессах пула
+                for book in books:
+                    self._load_book(book, search=False)
+                if self._index_shards(): # Триграммы этого процесса нужны только после изменений
+                    self._search_deferred = True
+                else: # Пул недоступен — строим индексы в этом процессе
+                    for book in self._books.values():
+                        self._insert_search_keys(book)
+                return
+            for book in books:
+                self._load_book(book)
+
+    def get_book(self, book_id: int) -> Optional[Book]:
+        """
+            Поиск книги по ID.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+
+            Returns:
+                Optional[Book]: Книга или None, если книга не найдена.
+        """
+        with self._lock.read():
+            book = self._books.get(book_id)
+        if book is None and self._pending is not None: # Книга может быть ещё не прочитана
+            self._ensure_loaded()
+            with self._lock.read():
+                book = self._books.get(book_id)
+        return book
+
+    def iter_books(self) -> Iterator[Book]:
+        """
+            Перебор книг в порядке добавления.
+
+            В ленивом режиме сначала отдаются уже прочитанные книги, затем
+            книги дочитываются из файла по одной.
+
+            Yields:
+                Book: Очередная книга.
+        """
+        with self._lock.read():
+            loaded = list(self._books.values())
+        yield from loaded
+        while True:
+            with self._lock.write():
+                if self._pending is None:
+                    return
+                book = self._next_pending()
+            if book is not None:
+                yield book
+
+    def iter_search_books(self, data: str, field: str) -> Iterator[Book]:
+        """
+            Поиск книг по заданному полю с выдачей результатов по мере нахождения.
+
+            В ленивом режиме первые результаты доступны до окончания чтения файла.
+
+            Args:
+                data (str): Значение для поиска.
+                field (str): Поле книги, по которому производится поиск.
+
+            Yields:
+                Book: Очередная найденная книга.
+        """
+        data = search_key(data) # Запрос нормализуется один раз
+        with self._lock.read():
+            found = self._search_loaded(data, field)
+        yield from found
+        while True:
+            with self._lock.write():
+                if self._pending is None:
+                    return
+                book = self._next_pending()
+            if book is not None and self._matches(book, data, field):
+                yield book
+
+    def _next_pending(self) -> Optional[Book]:
+        """
+            Чтение следующей книги ленивого режима.
+
+            Returns:
+                Optional[Book]: Прочитанная книга или None, если файл закончился.
+        """
+        try:
+            book = next(self._pending, None)
+        except StorageFormatError:
+            self._pending = None # Прочитанные книги остаются, но сохранять их нельзя (см. _stream)
+            raise
+        if book is None:
+            self._pending = None
+            return None
+        return self._load_book(book)
+
+    def _ensure_loaded(self) -> None:
+        """
+            Дочитывание файла в ленивом режиме.
+        """
+        if self._pending is None:
+            return
+        with self._lock.write():
+            while self._pending is not None:
+                self._next_pending()
+
+    def _stream(self, meta: Dict[str, Any]) -> Iterator[Book]:
+        """
+            Потоковое чтение книг из файла для ленивого режима.
+
+            Если файл отсутствует, книг нет. Если файл повреждён, вызывается
+            StorageFormatError, и сохранять недочитанный каталог поверх
+            файла нельзя.
+
+            Args:
+                meta (Dict[str, Any]): Сюда записываются данные снимка кроме книг.
+
+            Yields:
+                Book: Очередная книга из файла.
+
+            Raises:
+                StorageFormatError: Если файл повреждён.
+        """
+        try:
+            yield from self.storage.iter_books(self.file_path, meta)
+        except FileNotFoundError:
+            return
+        except StorageFormatError as error:
+            self._load_error = error
+            raise
+        self._next_id = max(self._next_id, meta.get("next_id") or 1) # Известен после чтения всех книг
+        self._reserved = [list(block) for block in meta.get("reserved", [])]
+
+    def _load_book(self, book: Book, search: bool = True) -> Book:
+        """
+            Добавление прочитанной из файла книги.
+
+            Args:
+                book (Book): Книга из файла.
+                search (bool): Добавлять ли книгу в триграммные индексы.
+
+            Returns:
+                Book: Добавленная книга.
+        """
+        if book.id is None:
+            book.id = self._next_id
+        elif book.id in self._books: # Дубликат ID из старых файлов — выдаём новый ID
+            book = Book.from_dict({**book.to_dict(), "id": self._next_id})
+        self._insert(book, search)
+        return book
+
+    def _insert(self, book: Book, search: bool = True) -> None:
+        """
+            Добавление книги в индекс (книга с тем же ID заменяется).
+
+            Args:
+                book (Book): Книга с установленным ID.
+                search (bool): Добавлять ли книгу в триграммные индексы.
+        """
+        self._generation += 1
+        if book.id >= self._next_id:
+            self._next_id = book.id + 1
+        replaced = self._books.pop(book.id, None) # Заменённая книга переезжает в конец, как при повторном добавлении
+        if replaced is not None:
+            self._unindex_values(replaced)
+        self._books[book.id] = book
+        if search:
+            self._search_indexes() # Триграммы уже прочитанных книг строятся до добавления новой
+            self._insert_search_keys(book)
+        self._title_index.add(book.id, book.title)
+        self._status_index.add(book.id, book.status)
+        if book.year is not None:
+            self._year_index.add(book.id, book.year)
+
+    def _insert_search_keys(self, book: Book) -> None:
+        """
+            Добавление книги в триграммные индексы полей поиска.
+
+            Args:
+                book (Book): Книга с установленным ID.
+        """
+        for field, index in self._search_index.items():
+            value = getattr(book, field)
+            if value is not None: # Пустые поля в поиск не попадают
+                index.add(book.id, search_key(value)) # Ключ вычисляется один раз при добавлении
+
+    def _delete(self, book_id: int) -> Optional[Book]:
+        """
+            Удаление книги из индекса.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+
+            Returns:
+                Optional[Book]: Удалённая книга или None, если книга не найдена.
+        """
+        self._generation += 1
+        for index in self._search_indexes().values():
+            index.remove(book_id)
+        book = self._books.pop(book_id, None)
+        if book is not None:
+            self._unindex_values(book)
+        return book
+
+    def _index_shards(self) -> bool:
+        """
+            Разделение каталога между процессами пула (вызывается под
+            блокировкой на запись).
+
+            Returns:
+                bool: True, если триграммы частей построены в процессах пула.
+        """
+        rows = [[book.id, *(getattr(book, field) for field in SEARCH_FIELDS)] for book in self._books.values()]
+        self._shards_generation = None
+        try:
+            self._shards.index(rows, SEARCH_FIELDS)
+        except (OSError, BrokenExecutor):
+            return False
+        self._shards_generation = self._generation
+        return True
+
+    def _search_indexes(self) -> Dict[str, NgramIndex]:
+        """
+            Триграммные индексы этого процесса (вызывается под блокировкой).
+
+            В параллельном режиме после загрузки триграммы есть только в
+            процессах пула; индексы этого процесса строятся при первом
+            обращении — перед изменением или поиском, который пул не
+            выполнил. Читатели строят их по одному.
+
+            Returns:
+                Dict[str, NgramIndex]: Индексы по полям поиска.
+        """
+        if self._search_deferred:
+            with self._search_building:
+                if self._search_deferred:
+                    for book in self._books.values():
+                        self._insert_search_keys(book)
+                    self._search_deferred = False
+        return self._search_index
+
+    def reshard(self) -> None:
+        """
+            Повторное разделение каталога между процессами после изменений
+            (в параллельном режиме), чтобы поиски снова шли параллельно.
+        """
+        if self._shards is None:
+            return
+        self._ensure_loaded()
+        with self._lock.write():
+            self._index_shards()
+
+    def close(self) -> None:
+        """
+            Остановка процессов параллельного режима.
+        """
+        if self._shards is not None:
+            self._shards.close()
+            self._shards_generation = None
+
+    def _unindex_values(self, book: Book) -> None:
+        """
+            Удаление книги из индексов точных значений.
+
+            Args:
+                book (Book): Книга из индекса.
+        """
+        self._title_index.remove(book.id, book.title)
+        self._status_index.remove(book.id, book.status)
+        self._year_index.remove(book.id, book.year)
+
+    def _set_status(self, book: Book, status: str) -> None:
+        """
+            Изменение статуса книги из индекса.
+
+            Args:
+                book (Book): Книга из индекса.
+                status (str): Новый статус.
+        """
+        self._status_index.remove(book.id, book.status)
+        book.status = status
+        self._status_index.add(book.id, book.status)
+        self._status_generation += 1
         
+    @instrumented("load_data")
     def load_data(self) -> None:
         """
             Загрузка данных-книг из файла.
             
-            Если файл отсутствует или содержит некорректные данные, список книг 
-            (self.books) будет пустым.   
+            Если файл отсутствует, список книг (self.books) будет пустым. Если
+            файл повреждён, вызывается StorageFormatError (в ленивом режиме — при
+            чтении книг), а изменения и сохранение отклоняются, пока файл не
+            будет прочитан успешно или книги не будут заданы явно (books = ...),
+            чтобы не записать неполный каталог поверх данных. В режиме журнала поверх снимка
+            применяются записи журнала. В ленивом режиме файл читается
+            потоково по мере обращения к книгам (если журнал не пуст,
+            файл читается сразу).
         """
-        try:
-            with open(self.file_path, "r", encoding="utf-8") as file:
-                data = json.load(file) # Загружаем данные из файла
-                self.books = [Book.from_dict(book) for book in data]
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.books = [] # Если файл отсутствует или некорректен, оставляем список пустым
+        with self._exclusive(): # Другой процесс не пишет, пока мы читаем
+            stamp = self._stamp()
+            if self.lazy and (self.journal is None or not self.journal.has_records()):
+                meta: Dict[str, Any] = {}
+                with self._lock.write():
+                    self._next_id = 1 # Следующий ID и блоки ID берутся из файла
+                    self._reserved = []
+                    self._replace([])
+                    self._load_error = None
+                    self._pending = self._stream(meta)
+                    self._next_pending() # Поля снимка записаны перед книгами: ревизия известна после первой книги
+                self._sync_feed(meta.get("revision", 0))
+                self._file_stamp = stamp
+                return
+            timings: Optional[Dict[str, float]] = {} if self.instrumentation is not None else None
+            meta = {}
+            try:
+                books = self.storage.load(self.file_path, timings, meta) # Загружаем данные из файла
+            except FileNotFoundError:
+                books = [] # Если файл отсутствует, оставляем список пустым
+            except StorageFormatError as error:
+                self._load_error = error # Повреждённый файл не перезаписываем
+                raise
+            start = time.perf_counter()
+            with self._lock.write():
+                self._next_id = meta.get("next_id") or 1 # В старых файлах next_id нет — считаем по ID книг
+                self._reserved = [list(block) for block in meta.get("reserved", [])]
+                self._replace(books)
+                self._load_error = None
+                revision = meta.get("revision", 0)
+                if self.journal is not None:
+                    try:
+                        for record in self.journal.replay(): # Применяем изменения после снимка
+                            self._apply(record)
+                            revision = max(revision, record.get("revision", 0))
+                    except (KeyError, TypeError, ValueError) as error: # Некорректная запись журнала
+                        self._load_error = StorageFormatError(
+                            f"Некорректная запись журнала {self.journal.path}: {error!r}")
+                        raise self._load_error from error
+            self._sync_feed(revision)
+            self._file_stamp = stamp
+            if timings is not None: # Разбор файла, создание книг и построение индексов
+                self.instrumentation.note(books_loaded=len(self._books),
+                                          index_seconds=time.perf_counter() - start, **timings)
             
+    @instrumented("save_data")
     def save_data(self) -> None:
         """
             Выгрузка данных в файл.
             
-            Директория создаётся автоматически, если отсутствует.
-        """
-        path = Path(self.file_path) # Создаём директорию, если её нет
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.file_path, "w", encoding="utf-8") as file:
-            json.dump(
-                [book.to_dict() for book in self.books],  # Сохраняем список книг
-                file,
-                sort_keys=True, # Сортируем ключи для читаемости
-                indent=4, # Форматируем JSON с отступами
-                ensure_ascii=False # Оставляем символы Unicode
-                )
+            Директория создаётся автоматически, если отсутствует. Данные
+            записываются во временный файл, который затем атомарно заменяет
+            старый, поэтому сбой во время записи не портит файл. В режиме
+            журнала после записи снимка журнал очищается. Отложенные мутации
+            входят в снимок и получают номера ревизий в ленте изменений.
+
+            Raises:
+                StorageFormatError: Если файл повреждён и не был прочитан
+                    (см. load_data).
+        """
+        self._ensure_loaded()
+        if self._load_error is not None:
+            raise StorageFormatError(f"Файл {self.file_path} не прочитан ({self._load_error}), "
+                                     f"сохранение поверх него отменено")
+        with self._exclusive():
+            pending, self._unsaved = self._unsaved, [] # Несохранённые мутации входят в снимок
+            records, revision = self._number(pending)
+            with self._lock.read(): # Поиски продолжаются во время записи
+                temp_path = f"{self.file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    self.storage.save(temp_path, self._books.values(), self._next_id, self._reserved,
+                                      revision) # Сохраняем список книг
+                    if self.instrumentation is not None:
+                        self.instrumentation.note(bytes_written=os.path.getsize(temp_path),
+                                                  books_written=len(self._books))
+                    with open(temp_path, "rb") as file:
+                        os.fsync(file.fileno()) # Данные на диске до подмены файла
+                    os.replace(temp_path, self.file_path)
+                except BaseException:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    self._unsaved = pending + self._unsaved
+                    raise
+                if self.journal is not None:
+                    self.journal.truncate() # Все изменения уже в снимке
+            self._file_stamp = self._stamp()
+            self._publish(records)
+
+    def _stamp(self) -> tuple:
+        """
+            Отпечаток файлов данных (снимка и журнала).
+
+            Returns:
+                tuple: Номер inode, время изменения и размер каждого файла.
+        """
+        paths = [self.file_path] + ([self.journal.path] if self.journal is not None else [])
+        stamps = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                stamps.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """
+            Исключительный доступ к файлам данных: один писатель в процессе
+            и блокировка файла между процессами.
+        """
+        Path(self.file_path).parent.mkdir(parents=True, exist_ok=True) # Создаём директорию, если её нет
+        with self._writer, self._file_lock:
+            yield
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """
+            Контекст мутации.
+
+            Держит исключительный доступ к файлам на всё время мутации и её
+            сохранения. Если с последней загрузки или записи файлы изменил
+            другой процесс, сначала данные перечитываются, а несохранённые
+            мутации применяются заново поверх них (см. _reload). Если файл не
+            удалось прочитать, загрузка повторяется, и при ошибке мутация не
+            выполняется.
+        """
+        with self._exclusive():
+            if not self._write_depth and (self._load_error is not None or (
+                    self._file_stamp is not None and self._stamp() != self._file_stamp)):
+                self._reload()
+            self._write_depth += 1
+            try:
+                yield
+            finally:
+                self._write_depth -= 1
+
+    def _reload(self) -> None:
+        """
+            Перечитывание файлов с переносом несохранённых мутаций (при
+            autosave=False) поверх новых данных.
+
+            ID несохранённых книг и блоков уже учтены в файле ID (см.
+            _allocate), другие процессы их не выдавали, поэтому мутации
+            применяются с теми же ID. Изменения статуса и удаления книг,
+            которых в файле уже нет, отбрасываются. Полученные ранее объекты
+            Book несохранённых книг после переноса не принадлежат библиотеке
+            (актуальные — через get_book).
+        """
+        pending = self._unsaved
+        self.load_data() # При ошибке несохранённые мутации остаются отложенными
+        self._ensure_loaded()
+        if not pending:
+            return
+        self._unsaved = []
+        with self._lock.write():
+            for record in pending:
+                if record["op"] in ("status", "remove") and record["id"] not in self._books: # Книгу удалил другой процесс
+                    continue
+                self._apply(record)
+                self._unsaved.append(record)
+
+    def _allocate(self, count: int, claim: bool = False) -> int:
+        """
+            Выдача новых ID (под блокировкой файла данных).
+
+            ID выдаются не меньше границы из файла ID, поэтому не совпадают с
+            ID несохранённых мутаций других процессов. Если мутация не
+            сохраняется сразу (autosave=False), граница сдвигается в файле ID
+            до выхода из блокировки: вне пакета — здесь, в пакете — при его
+            завершении.
+
+            Args:
+                count (int): Количество ID.
+                claim (bool): Сдвинуть границу сразу в любом режиме (блоки
+                    reserve_ids не выдаются повторно, даже если пакет откатится).
+
+            Returns:
+                int: Первый выданный ID.
+        """
+        start = max(self._next_id, self._ids.read())
+        if claim or not self.autosave and not self._batch_depth:
+            self._ids.claim(start + count)
+        self._next_id = start + count
+        return start
+
+    def compact(self) -> None:
+        """
+            Компактизация: запись снимка и очистка журнала.
+        """
+        self.save_data()
+
+    def _commit(self, record: dict[str, Any], undo: Optional[tuple] = None) -> None:
+        """
+            Сохранение одной мутации.
+
+            Без журнала перезаписывается весь файл, в режиме журнала запись
+            дописывается в конец журнала, а при его разрастании выполняется
+            компактизация.
+
+            Args:
+                record (dict[str, Any]): Запись о мутации.
+                undo (Optional[tuple]): Действие для отката мутации внутри
+                    пакета: ("remove", ID, ID из блока), ("status", книга,
+                    старый статус), ("add", удалённая книга) или ("reserve",
+                    начало, конец блока).
+        """
+        if self._batch_depth: # Внутри пакета сохраняем один раз в конце
+            self._batch_records.append(record)
+            if undo is not None:
+                self._undo.append(undo)
+            return
+        self._persist([record])
+
+    def _persist(self, records: List[dict[str, Any]]) -> None:
+        """
+            Сохранение мутаций сразу или откладывание до flush.
+
+            Args:
+                records (List[dict[str, Any]]): Записи о мутациях.
+        """
+        if self.autosave:
+            self._flush(records)
+        else:
+            self._unsaved.extend(records)
+
+    @instrumented("flush")
+    def flush(self) -> None:
+        """
+            Сохранение отложенных мутаций (при autosave=False).
+
+            Если сохранить не удалось, мутации остаются отложенными до
+            следующего вызова.
+        """
+        with self._writing():
+            records, self._unsaved = self._unsaved, []
+            if not records:
+                return
+            try:
+                self._flush(records)
+            except BaseException:
+                self._unsaved = records + self._unsaved
+                raise
+
+    @property
+    def unsaved(self) -> int:
+        """
+            Количество отложенных мутаций.
+
+            Returns:
+                int: Количество мутаций, ещё не сохранённых в файл.
+        """
+        return len(self._unsaved)
+
+    def _flush(self, records: List[dict[str, Any]]) -> None:
+        """
+            Сохранение мутаций.
+
+            Без журнала перезаписывается весь файл, в режиме журнала записи
+            дописываются в конец журнала одной операцией записи. После
+            записи в журнал мутации сохранены, поэтому сбой компактизации
+            не вызывает ошибку: журнал остаётся, и компактизация повторяется
+            при следующем сохранении.
+
+            Args:
+                records (List[dict[str, Any]]): Записи о мутациях.
+        """
+        if self.journal is None:
+            self._unsaved[:0] = records # Снимок сохраняет их вместе с отложенными (см. save_data)
+            try:
+                self.save_data()
+            except BaseException:
+                del self._unsaved[:len(records)]
+                raise
+            return
+        records, _ = self._number(records) # Ревизия данных — наибольшая ревизия в журнале
+        written = self.journal.append(records)
+        if self.instrumentation is not None:
+            self.instrumentation.note(bytes_written=written, journal_records=len(records))
+        self._file_stamp = self._stamp()
+        self._publish(records)
+        if self.journal.size >= self.compact_every:
+            try:
+                self.compact()
+            except OSError as error: # Записи уже в журнале: сбой снимка их не откатывает
+                logger.warning("Не удалось записать снимок %s, журнал сохранён: %s", self.file_path, error)
+
+    def _number(self, records: List[dict[str, Any]]) -> Tuple[List[dict[str, Any]], int]:
+        """
+            Нумерация изменений ревизиями ленты перед записью данных (под
+            блокировкой файла данных).
+
+            Args:
+                records (List[dict[str, Any]]): Записи о мутациях.
+
+            Returns:
+                Tuple[List[dict[str, Any]], int]: Записи (изменения книг — с
+                    полем "revision") и ревизия данных после них.
+        """
+        revision = self.change_feed.sync()
+        numbered = []
+        for record in records:
+            if record["op"] != "reserve": # Резервирование ID книг не меняет
+                revision += 1
+                record = {"revision": revision, **record}
+            numbered.append(record)
+        return numbered, revision
+
+    def _publish(self, records: List[dict[str, Any]]) -> None:
+        """
+            Запись сохранённых изменений в ленту.
+
+            Args:
+                records (List[dict[str, Any]]): Записи о мутациях после _number.
+        """
+        changes = [record for record in records if record["op"] != "reserve"]
+        if changes:
+            try:
+                self.change_feed.append(changes)
+            except (OSError, ValueError) as error: # Данные уже сохранены: сбой ленты их не откатывает
+                logger.warning("Не удалось записать ленту изменений %s: %s", self.change_feed.path, error)
+                self._break_feed(changes[-1]["revision"])
+
+    def _sync_feed(self, revision: int) -> None:
+        """
+            Согласование ленты изменений с ревизией прочитанных данных (под
+            блокировкой файла данных).
+
+            Если лента (в том числе общая с другими экземплярами) уже
+            содержит все изменения данных, история сохраняется; иначе данные
+            изменены не через эту ленту, и история прерывается.
+
+            Args:
+                revision (int): Ревизия данных из файла (0 — в старых файлах).
+        """
+        if self.change_feed.sync() != revision:
+            self._break_feed(revision)
+
+    def _break_feed(self, revision: int = 0) -> None:
+        """
+            Прерывание истории ленты изменений (под блокировкой файла данных).
+
+            Сбой записи файла ленты не мешает работе с данными: история в
+            памяти прерывается в любом случае, и потребители этого экземпляра
+            синхронизируются полностью.
+
+            Args:
+                revision (int): Ревизия данных: номер ревизии ленты будет не меньше.
+        """
+        try:
+            self.change_feed.reset(revision)
+        except OSError as error:
+            logger.warning("Не удалось записать прерывание ленты изменений %s: %s", self.change_feed.path, error)
+
+    @property
+    def revision(self) -> int:
+        """
+            Номер текущей ревизии данных.
+
+            Returns:
+                int: Номер ревизии последнего сохранённого изменения.
+        """
+        return self.change_feed.revision
+
+    def changes_since(self, revision: int) -> List[dict[str, Any]]:
+        """
+            Изменения после ревизии для инкрементальной синхронизации.
+
+            Потребитель хранит номер ревизии своей копии каталога (revision на
+            момент полного чтения или последней синхронизации) и применяет
+            только полученные изменения. В ленте — изменения, сохранённые в
+            файл (при autosave=False — после flush).
+
+            Args:
+                revision (int): Номер ревизии копии потребителя.
+
+            Returns:
+                List[dict[str, Any]]: Изменения по порядку, например
+                    {"revision": 8, "op": "add", "book": {...}},
+                    {"revision": 9, "op": "status", "id": 3, "status": "выдана"},
+                    {"revision": 10, "op": "remove", "id": 3}.
+
+            Raises:
+                ValueError: Если изменения после ревизии недоступны (вытеснены
+                    из ленты или история прервана) — нужна полная синхронизация.
+        """
+        return self.change_feed.since(revision)
+
+    @contextmanager
+    def batch(self) -> Iterator['Library']:
+        """
+            Пакет мутаций с одним сохранением в конце.
+
+            Изменения внутри блока применяются в памяти и сохраняются одним
+            вызовом save_data (или одной записью в журнал) при выходе из блока
+            (при autosave=False — откладываются до flush).
+            Если внутри блока или при сохранении возникло исключение, все
+            изменения пакета откатываются. Вложенный пакет становится частью
+            внешнего.
+
+            Поиски ждут окончания блока и не видят незавершённый пакет.
+
+            Yields:
+                Library: Эта же библиотека.
+        """
+        with self._writing():
+            if self._batch_depth:
+                self._batch_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._batch_depth -= 1
+                return
+            self._ensure_loaded()
+            self._batch_depth = 1
+            try:
+                with self._lock.write():
+                    yield self
+                self._batch_depth = 0
+                if self._batch_records:
+                    if not self.autosave: # ID пакета выданы до записи данных (см. _allocate)
+                        self._ids.claim(self._next_id)
+                    self._persist(self._batch_records)
+            except BaseException:
+                with self._lock.write():
+                    self._rollback() # Изменения пакета в ленту не попадали
+                raise
+            finally:
+                self._batch_depth = 0
+                self._batch_records = []
+                self._undo = []
+                self._undo_order = None
+
+    def _rollback(self) -> None:
+        """
+            Откат мутаций пакета в обратном порядке (вызывается под
+            блокировкой на запись).
+
+            Затрагиваются только изменённые пакетом книги, поэтому стоимость
+            отката не зависит от размера каталога (кроме восстановления
+            порядка книг, если пакет удалял книги).
+        """
+        for action, *args in reversed(self._undo):
+            if action == "reserve": # Блок ID снимается, но его ID больше не выдаются
+                start, end = args
+                self._reserved = [block for block in self._reserved if not start <= block[0] < end]
+            elif action == "remove": # Отмена добавления
+                self._delete(args[0])
+                if args[1]: # ID возвращается в зарезервированный блок
+                    bisect.insort(self._reserved, [args[0], args[0] + 1])
+            elif action == "status":
+                self._set_status(*args)
+            else: # Отмена удаления
+                self._insert(args[0])
+        if self._undo_order is not None: # Удалённые книги возвращаются на свои места
+            self._books = {book_id: self._books[book_id] for book_id in self._undo_order if book_id in self._books}
+
+    def _apply(self, record: dict[str, Any]) -> None:
+        """
+            Применение записи журнала к списку книг.
+
+            Повторное применение записи безопасно: это нужно на случай сбоя
+            между записью снимка и очисткой журнала.
+
+            Args:
+                record (dict[str, Any]): Запись о мутации.
+        """
+        op = record["op"]
+        if op == "add":
+            self._take_reserved(record["book"]["id"]) # Зарезервированный ID занят (если ещё не занят)
+            self._insert(Book.from_dict(record["book"]))
+        elif op == "status":
+            book = self._books.get(record["id"])
+            if book is not None:
+                self._set_status(book, record["status"])
+        elif op == "remove":
+            self._delete(record["id"])
+        elif op == "reserve":
+            start, end = record["start"], record["next_id"]
+            index = bisect.bisect_left(self._reserved, start, key=lambda block: block[0])
+            known = (index > 0 and self._reserved[index - 1][1] > start or
+                     index < len(self._reserved) and self._reserved[index][0] < end) # Блок (или его часть) уже в снимке
+            if start < end and not known:
+                self._reserved.insert(index, [start, end])
+            self._next_id = max(self._next_id, end)
+        else:
+            raise ValueError(f"Неизвестная операция в журнале: {op}")
             
-    def add_book(self, title: str, author: str, year: int) -> Book:
+    @instrumented("add_book")
+    def add_book(self, title: str, author: str, year: int, book_id: Optional[int] = None) -> Book:
         """
             Добавление книги в библиотеку и в файл.
             
@@ -62,16 +966,103 @@ class Library:
                 title (str): Название книги.
                 author (str): Автор книги.
                 year (int): Год издания.
+                book_id (Optional[int]): ID из блока, выданного reserve_ids. По
+                    умолчанию книга получает следующий свободный ID.
 
             Returns:
                 Book: Экземпляр добавленной книги.
+
+            Raises:
+                ValueError: Если book_id не был выдан reserve_ids или уже занят.
         """
-        new_book = Book(title, author, year)
-        new_book.id = len(self.books) + 1 # Устанавливаем уникальный ID
-        self.books.append(new_book)
-        self.save_data() # Сохраняем обновлённые данные
+        with self._writing():
+            self._ensure_loaded()
+            with self._lock.write():
+                reserved = book_id is not None
+                if reserved and (book_id in self._books or not self._take_reserved(book_id)):
+                    raise ValueError(f"ID {book_id} не зарезервирован или уже занят")
+                new_book = Book(title, author, year)
+                new_book.id = book_id if reserved else self._allocate(1) # Устанавливаем уникальный ID
+                self._insert(new_book)
+            self._commit({"op": "add", "book": new_book.to_dict()}, ("remove", new_book.id, reserved)) # Сохраняем изменение
         return new_book
+
+    def _take_reserved(self, book_id: int) -> bool:
+        """
+            Занятие ID из зарезервированного блока (блок делится на части).
+
+            Args:
+                book_id (int): ID книги.
+
+            Returns:
+                bool: True, если ID был зарезервирован и не занят.
+        """
+        index = bisect.bisect_right(self._reserved, book_id, key=lambda block: block[0]) - 1
+        if index < 0 or book_id >= self._reserved[index][1]:
+            return False
+        start, end = self._reserved[index]
+        self._reserved[index:index + 1] = [block for block in ([start, book_id], [book_id + 1, end])
+                                           if block[0] < block[1]]
+        return True
     
+    def reserve_ids(self, count: int) -> range:
+        """
+            Резервирование блока ID, например для массового импорта.
+
+            ID блока больше не выдаются никому, в том числе другим процессам,
+            работающим с тем же файлом; книги с ними добавляются через
+            add_book(..., book_id=...), каждый ID — один раз. Незанятые ID
+            блоков сохраняются вместе с данными. Граница ID сдвигается в файле
+            ID сразу, в том числе при autosave=False и внутри пакета; если
+            пакет откатывается, блок снимается, но его ID не выдаются.
+
+            Args:
+                count (int): Количество ID.
+
+            Returns:
+                range: Зарезервированные ID.
+
+            Raises:
+                ValueError: Если count отрицательный.
+        """
+        if count < 0:
+            raise ValueError("Количество ID не может быть отрицательным")
+        with self._writing():
+            self._ensure_loaded()
+            with self._lock.write():
+                start = self._allocate(count, claim=True)
+                if count:
+                    self._reserved.append([start, self._next_id]) # Новый блок — последний по возрастанию
+            self._commit({"op": "reserve", "start": start, "next_id": self._next_id},
+                         ("reserve", start, self._next_id)) # Сохраняем изменение
+        return range(start, start + count)
+
+    @property
+    def next_id(self) -> int:
+        """
+            Следующий свободный ID.
+
+            Returns:
+                int: ID, который получит следующая добавленная книга.
+        """
+        self._ensure_loaded()
+        return max(self._next_id, self._ids.read()) # Граница ID несохранённых мутаций других процессов
+
+    def add_books(self, books: Iterable[Tuple[str, str, int]]) -> List[Book]:
+        """
+            Добавление нескольких книг с одним сохранением.
+
+            Args:
+                books (Iterable[Tuple[str, str, int]]): Название, автор и год
+                    издания каждой книги.
+
+            Returns:
+                List[Book]: Добавленные книги.
+        """
+        with self.batch():
+            return [self.add_book(title, author, year) for title, author, year in books]
+
+    @instrumented("update_book_status")
     def update_book_status(self, book_id: int, status: str) -> None:
         """
             Изменение статуса книги.
@@ -86,13 +1077,18 @@ class Library:
         """
         if status not in BookStatus.list(): # Проверяем допустимость статуса
             return False
-        for book in self.books:
-            if book_id == book.id: # Находим книгу по ID
-                book.status = status # Обновляем статус
-                self.save_data() # Сохраняем обновлённые данные
-                return True
-        return False
+        with self._writing():
+            self._ensure_loaded()
+            with self._lock.write():
+                book = self._books.get(book_id) # Находим книгу по ID
+                if book is None:
+                    return False
+                old_status = book.status
+                self._set_status(book, status) # Обновляем статус
+            self._commit({"op": "status", "id": book_id, "status": status}, ("status", book, old_status)) # Сохраняем изменение
+        return True
     
+    @instrumented("remove_book")
     def remove_book(self, book_id: int) -> bool:
         """
             Удаление книги из библиотеки и файла.
@@ -103,16 +1099,67 @@ class Library:
             Returns:
                 bool: True, если книга удалена; False, если книга не найдена.
         """
-        for book in self.books:
-            if book_id == book.id:
-                self.books.remove(book) # Удаляем кни
-                self.save_data() # Сохраняем обновлённые данные
-                return True
-        return False
+        with self._writing():
+            self._ensure_loaded()
+            with self._lock.write():
+                if self._batch_depth and self._undo_order is None and book_id in self._books:
+                    self._undo_order = list(self._books) # Порядок книг для отката удаления
+                removed = self._delete(book_id) # Удаляем книгу
+                if removed is None:
+                    return False
+            self._commit({"op": "remove", "id": book_id}, ("add", removed)) # Сохраняем изменение
+        return True
     
+    def update_statuses(self, statuses: Mapping[int, str]) -> bool:
+        """
+            Изменение статусов нескольких книг с одним сохранением.
+
+            Статусы меняются, только если все книги найдены и все статусы допустимы.
+
+            Args:
+                statuses (Mapping[int, str]): Новый статус для каждого ID книги.
+
+            Returns:
+                bool: True, если все статусы обновлены; False, если какая-то книга
+                    или статус не найдены (тогда ничего не меняется).
+        """
+        with self.batch():
+            if any(status not in BookStatus.list() or self.get_book(book_id) is None
+                   for book_id, status in statuses.items()):
+                return False
+            for book_id, status in statuses.items():
+                self.update_book_status(book_id, status)
+        return True
+
+    def remove_books(self, book_ids: Iterable[int]) -> bool:
+        """
+            Удаление нескольких книг с одним сохранением.
+
+            Книги удаляются, только если найдены все.
+
+            Args:
+                book_ids (Iterable[int]): ID удаляемых книг.
+
+            Returns:
+                bool: True, если книги удалены; False, если какая-то книга не
+                    найдена (тогда ничего не удаляется).
+        """
+        book_ids = list(dict.fromkeys(book_ids)) # Без повторов, в исходном порядке
+        with self.batch():
+            if not all(self.get_book(book_id) is not None for book_id in book_ids):
+                return False
+            for book_id in book_ids:
+                self.remove_book(book_id)
+        return True
+
+    @instrumented("search_books")
     def search_books(self, data: str, field: str) -> List[Book]:
         """
             Поиск книг по заданному полю.
+
+            Результаты кэшируются (search_cache) до изменения книг, от которых
+            они зависят: изменение статуса не сбрасывает поиск по названию,
+            автору и году.
             
             Args:
                 data (str): Значение для поиска.
@@ -121,16 +1168,175 @@ class Library:
             Returns:
                 List[Book]: Список книг, соответствующих критерию поиска.
         """
-        results = []
-        for book in self.books: 
-            value = getattr(book, field, None) # Получаем значение поля
+        data = search_key(data) # Запрос нормализуется один раз
+        self._ensure_loaded()
+        with self._lock.read():
+            key, generation = (field, data), self._cache_generation(field)
+            found = self.search_cache.get(key, generation)
+            if found is not None:
+                if self.instrumentation is not None:
+                    self.instrumentation.note(cache_hits=1, books_found=len(found))
+                return found
+            found = self._search_loaded(data, field)
+            self.search_cache.put(key, generation, found)
+            if self.instrumentation is not None: # Сколько книг проверил поиск
+                index = self._search_indexes().get(field)
+                scanned = index.count_candidates(data) if index is not None else len(self._books)
+                self.instrumentation.note(books_scanned=scanned, books_found=len(found))
+            return found
 
-            if value is not None and data in str(value).lower(): # Если значение существует, преобразуем его к строке и ищем совпадение
-                results.append(book)
+    def _cache_generation(self, field: str) -> tuple:
+        """
+            Поколение данных, от которых зависит результат поиска по полю.
 
-        return results
-    
-    
-   
-    
-    
\ No newline at end of file
+            Добавление и удаление книг меняют результаты по любому полю, а
+            изменение статуса — только поиск по статусу.
+
+            Args:
+                field (str): Поле книги, по которому производится поиск.
+
+            Returns:
+                tuple: Поколение данных для кэша.
+        """
+        if field == "status":
+            return self._generation, self._status_generation
+        return (self._generation,)
+
+    def _search_loaded(self, data: str, field: str) -> List[Book]:
+        """
+            Поиск среди уже прочитанных книг (вызывается под блокировкой на чтение).
+
+            Args:
+                data (str): Ключ запроса (search_key).
+                field (str): Поле книги, по которому производится поиск.
+
+            Returns:
+                List[Book]: Список найденных книг.
+        """
+        if field in self._search_index: # Проверяем только книги-кандидаты из индекса
+            book_ids = None
+            if self._shards is not None and self._shards_generation == self._generation:
+                book_ids = self._shards.search(field, data) # Части каталога ищутся параллельно
+            if book_ids is None:
+                book_ids = self._search_indexes()[field].search(data)
+            return [self._books[book_id] for book_id in book_ids]
+        return [book for book in self._books.values() if self._matches(book, data, field)]
+
+    def query(self, query: Optional[Query] = None, **conditions: Any) -> Iterator[Book]:
+        """
+            Поиск книг по нескольким условиям с сортировкой и страницами.
+
+            Планировщик выбирает самый избирательный из индексов (точное
+            название, статус, диапазон годов, триграммы автора) и проверяет
+            остальные условия только у книг-кандидатов. Книги отдаются по мере
+            проверки; при сортировке по году с условием на год индекс годов
+            обходится по одному году, без сортировки всех кандидатов.
+
+            Args:
+                query (Optional[Query]): Запрос.
+                **conditions: Параметры Query, если запрос не передан.
+
+            Returns:
+                Iterator[Book]: Книги страницы запроса (offset, limit).
+        """
+        if query is None:
+            query = Query(**conditions)
+        self._ensure_loaded()
+        author_index = self._search_index["author"] # Готовые ключи авторов для проверки условия
+        books = (book for book in map(self._books.get, self._query_ids(query))
+                 if book is not None and query.matches(book, author_index.key(book.id))) # Удалённые после планирования пропускаем
+        stop = None if query.limit is None else query.offset + query.limit
+        return itertools.islice(books, query.offset, stop)
+
+    def explain(self, query: Query) -> Tuple[str, int]:
+        """
+            План запроса.
+
+            Args:
+                query (Query): Запрос.
+
+            Returns:
+                Tuple[str, int]: Выбранный индекс ("title", "status", "year",
+                    "author" или "scan" — перебор всех книг) и количество
+                    книг-кандидатов.
+        """
+        self._ensure_loaded()
+        with self._lock.read():
+            return self._plan(query)
+
+    def _plan(self, query: Query) -> Tuple[str, int]:
+        """
+            Выбор индекса с наименьшим количеством кандидатов (вызывается под
+            блокировкой на чтение).
+        """
+        plans = []
+        if query.title is not None:
+            plans.append(("title", len(self._title_index.get(query.title))))
+        if query.status is not None:
+            plans.append(("status", len(self._status_index.get(query.status))))
+        if query.year_from is not None or query.year_to is not None:
+            plans.append(("year", self._year_index.count_between(query.year_from, query.year_to)))
+        if query.author:
+            plans.append(("author", self._search_indexes()["author"].count_candidates(query.author_key)))
+        plans.append(("scan", len(self._books)))
+        return min(plans, key=lambda plan: plan[1])
+
+    def _query_ids(self, query: Query) -> Iterator[int]:
+        """
+            ID книг-кандидатов запроса в порядке сортировки.
+
+            Yields:
+                int: ID очередного кандидата.
+        """
+        with self._lock.read():
+            plan, _ = self._plan(query)
+            if plan == "year" and query.order_by == "year": # Годы уже упорядочены индексом
+                years = self._year_index.values_between(query.year_from, query.year_to, query.descending)
+            else:
+                years = None
+                if plan == "title":
+                    ids = list(self._title_index.get(query.title))
+                elif plan == "status":
+                    ids = list(self._status_index.get(query.status))
+                elif plan == "year":
+                    ids = list(self._year_index.iter_between(query.year_from, query.year_to))
+                elif plan == "author":
+                    ids = list(self._search_indexes()["author"].candidates(query.author_key))
+                else:
+                    ids = list(self._books)
+                if query.order_by == "id":
+                    ids.sort(reverse=query.descending)
+                else:
+                    books, field = self._books, query.order_by
+                    ids.sort(key=lambda book_id: (getattr(books[book_id], field), book_id), reverse=query.descending)
+        if years is None:
+            yield from ids
+            return
+        for year in years:
+            with self._lock.read():
+                ids = sorted(self._year_index.get(year), reverse=query.descending)
+            yield from ids
+
+    def _matches(self, book: Book, data: str, field: str) -> bool:
+        """
+            Проверка совпадения поля книги с запросом.
+
+            Для полей с индексом используется ключ, вычисленный при добавлении
+            книги; для остальных ключ вычисляется при проверке.
+
+            Args:
+                book (Book): Проверяемая книга.
+                data (str): Ключ запроса (search_key).
+                field (str): Поле книги, по которому производится поиск.
+
+            Returns:
+                bool: True, если значение поля содержит запрос.
+        """
+        index = self._search_index.get(field)
+        key = index.key(book.id) if index is not None else None
+        if key is None:
+            value = getattr(book, field, None) # Получаем значение поля
+            if value is None:
+                return False
+            key = search_key(value)
+        return data in key
@@ -0,0 +1,158 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ReadWriteLock:
+    """
+        Блокировка «читатели-писатель».
+
+        Читатели выполняются параллельно друг с другом, писатель — только в
+        одиночку. Ожидающий писатель не пропускает новых читателей, чтобы
+        поток поисков не мог бесконечно откладывать изменения. Блокировка
+        повторно входима: поток-писатель может снова брать её на запись и на
+        чтение, поток-читатель — на чтение. Переход с чтения на запись
+        запрещён (он привёл бы к взаимной блокировке).
+    """
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers: Dict[int, int] = {} # ID потока -> глубина чтения
+        self._writer: Optional[int] = None # ID потока-писателя
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """
+            Захват блокировки на чтение.
+        """
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me: # Писатель читает свои же данные
+                owned = False
+            else:
+                if me not in self._readers:
+                    while self._writer is not None or self._waiting_writers:
+                        self._condition.wait()
+                self._readers[me] = self._readers.get(me, 0) + 1
+                owned = True
+        try:
+            yield
+        finally:
+            if owned:
+                with self._condition:
+                    self._readers[me] -= 1
+                    if not self._readers[me]:
+                        del self._readers[me]
+                        if not self._readers:
+                            self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """
+            Захват блокировки на запись.
+
+            Raises:
+                RuntimeError: Если поток уже держит блокировку на чтение.
+        """
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writer_depth += 1
+            else:
+                if me in self._readers:
+                    raise RuntimeError("Нельзя захватить блокировку на запись, удерживая её на чтение.")
+                self._waiting_writers += 1
+                try:
+                    while self._writer is not None or self._readers:
+                        self._condition.wait()
+                finally:
+                    self._waiting_writers -= 1
+                self._writer = me
+                self._writer_depth = 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer_depth -= 1
+                if not self._writer_depth:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+class FileLock:
+    """
+        Межпроцессная рекомендательная (advisory) блокировка файла.
+
+        Использует flock на POSIX и msvcrt.locking на Windows. Повторно входима
+        в пределах экземпляра; потоки одного процесса должны дополнительно
+        синхронизироваться между собой (например, threading.RLock).
+
+        Атрибуты:
+            path (str): Путь к файлу блокировки.
+    """
+    def __init__(self, path: str):
+        """
+            Инициализация блокировки.
+
+            Args:
+                path (str): Путь к файлу блокировки (создаётся при первом захвате).
+        """
+        self.path = path
+        self._fd: Optional[int] = None
+        self._depth = 0
+
+    def acquire(self) -> None:
+        """
+            Захват блокировки с ожиданием.
+        """
+        if self._depth:
+            self._depth += 1
+            return
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError: # LK_LOCK сдаётся после 10 попыток — ждём дальше
+                        continue
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._depth = 1
+
+    def release(self) -> None:
+        """
+            Освобождение блокировки.
+        """
+        self._depth -= 1
+        if self._depth:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
@@ -1,14 +1,206 @@
+import argparse
+import itertools
+import json
+import sys
+from typing import Any, Iterable, List, Optional, TextIO
+
 from library import Library
 from book import BookStatus
+from storage import StorageFormatError
+
+PAGE_SIZE = 20 # Количество книг на странице списка
+MUTATIONS = ("add", "remove", "status") # Команды, изменяющие библиотеку
+
+
+def run_command(library: Library, command: dict[str, Any]) -> dict[str, Any]:
+    """
+        Выполнение одной команды неинтерактивного режима.
+
+        Команда — словарь с полем "op" и аргументами:
+            {"op": "add", "title": ..., "author": ..., "year": ...}
+            {"op": "remove", "id": ...}
+            {"op": "status", "id": ..., "status": ...}
+            {"op": "search", "field": "title" | "author" | "year", "query": ...}
+            {"op": "list"}
+
+        Args:
+            library (Library): Библиотека.
+            command (dict[str, Any]): Команда.
+
+        Returns:
+            dict[str, Any]: Результат: "ok", "op" и данные команды ("book",
+                "books") или описание ошибки ("error").
+    """
+    op = command.get("op") if isinstance(command, dict) else None
+    result: dict[str, Any] = {"ok": True, "op": op}
+    try:
+        match op:
+            case "add":
+                result["book"] = library.add_book(str(command["title"]), str(command["author"]),
+                                                  int(command["year"])).to_dict()
+            case "remove":
+                result["id"] = int(command["id"])
+                if not library.remove_book(result["id"]):
+                    result.update(ok=False, error="Книга не найдена")
+            case "status":
+                result["id"] = int(command["id"])
+                if not library.update_book_status(result["id"], command["status"]):
+                    result.update(ok=False, error=f"Книга не найдена или недопустимый статус "
+                                                  f"(допустимые: {', '.join(BookStatus.list())})")
+            case "search":
+                if command["field"] not in ("title", "author", "year"):
+                    raise ValueError("поле для поиска должно быть 'title', 'author' или 'year'")
+                result["books"] = [book.to_dict() for book in library.search_books(str(command["query"]),
+                                                                                   command["field"])]
+            case "list":
+                result["books"] = [book.to_dict() for book in library.iter_books()]
+            case _:
+                result.update(ok=False, error=f"Неизвестная команда: {op}")
+    except KeyError as error:
+        result.update(ok=False, error=f"Не указан аргумент {error}")
+    except (TypeError, ValueError) as error:
+        result.update(ok=False, error=str(error))
+    return result
+
+
+def run_script(library: Library, lines: Iterable[str], output: TextIO, flush_every: int = 0) -> bool:
+    """
+        Выполнение потока команд (по одной JSON-команде в строке).
+
+        Мутации не сохраняются по одной: библиотека должна быть создана с
+        autosave=False, отложенные мутации сохраняются через каждые
+        flush_every мутаций и один раз в конце. На каждую непустую строку
+        выводится одна строка JSON с результатом (см. run_command).
+
+        Args:
+            library (Library): Библиотека (autosave=False).
+            lines (Iterable[str]): Строки с командами.
+            output (TextIO): Поток для результатов.
+            flush_every (int): Сохранять через каждые flush_every мутаций
+                (0 — только в конце).
+
+        Returns:
+            bool: True, если все команды выполнены успешно.
+    """
+    success = True
+    try:
+        for line in lines:
+            if not line.strip(): # Пустые строки пропускаем
+                continue
+            try:
+                command = json.loads(line)
+            except json.JSONDecodeError as error:
+                result = {"ok": False, "op": None, "error": f"Некорректный JSON: {error}"}
+            else:
+                result = run_command(library, command)
+            success = success and result["ok"]
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            if flush_every and library.unsaved >= flush_every:
+                library.flush()
+    finally:
+        library.flush() # Сохраняем оставшиеся мутации, даже если поток прерван
+    return success
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+        Разбор аргументов командной строки.
+
+        Args:
+            argv (Optional[List[str]]): Аргументы (по умолчанию sys.argv[1:]).
 
-def main():
+        Returns:
+            argparse.Namespace: Разобранные аргументы.
     """
-        Основная функция работы с библиотекой.
+    parser = argparse.ArgumentParser(
+        description="Система управления библиотекой. Без команды запускается интерактивное меню.")
+    parser.add_argument("--file", default="data.json", help="Файл с данными (по умолчанию data.json)")
+    parser.add_argument("--script", metavar="FILE",
+                        help="Файл с командами в формате JSON, по одной в строке ('-' — стандартный ввод)")
+    parser.add_argument("--flush-every", type=int, default=0, metavar="N",
+                        help="Сохранять каждые N мутаций (по умолчанию — один раз в конце)")
+    commands = parser.add_subparsers(dest="op")
+    add = commands.add_parser("add", help="Добавить книгу")
+    add.add_argument("title")
+    add.add_argument("author")
+    add.add_argument("year", type=int)
+    remove = commands.add_parser("remove", help="Удалить книгу")
+    remove.add_argument("id", type=int)
+    status = commands.add_parser("status", help="Изменить статус книги")
+    status.add_argument("id", type=int)
+    status.add_argument("status", choices=BookStatus.list())
+    search = commands.add_parser("search", help="Искать книги")
+    search.add_argument("field", choices=("title", "author", "year"))
+    search.add_argument("query")
+    commands.add_parser("list", help="Показать все книги")
+    args = parser.parse_args(argv)
+    if args.script is not None and args.op is not None:
+        parser.error("--script нельзя использовать вместе с командой")
+    if args.flush_every < 0:
+        parser.error("--flush-every не может быть отрицательным")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+        Точка входа: команда из аргументов, поток команд (--script) или
+        интерактивное меню.
+
+        Args:
+            argv (Optional[List[str]]): Аргументы (по умолчанию sys.argv[1:]).
+
+        Returns:
+            int: Код завершения: 0, если все команды выполнены успешно, иначе 1.
+    """
+    args = parse_args(argv)
+    try:
+        if args.script is None and args.op is None:
+            interactive(args.file)
+            return 0
+        return run(args)
+    except StorageFormatError as error: # Повреждённый файл не перезаписываем
+        print(f"Ошибка: {error}", file=sys.stderr)
+        return 1
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+        Неинтерактивный режим: одна команда из аргументов или поток команд.
+
+        Args:
+            args (argparse.Namespace): Разобранные аргументы.
+
+        Returns:
+            int: Код завершения: 0, если все команды выполнены успешно, иначе 1.
+    """
+    library = Library(file_path=args.file, autosave=False) # Один снимок на весь поток команд
+    library.load_data()
+    try:
+        if args.script is None: # Одна команда из аргументов
+            command = {key: value for key, value in vars(args).items() if key not in ("file", "script", "flush_every")}
+            result = run_command(library, command)
+            library.flush()
+            print(json.dumps(result, ensure_ascii=False))
+            return 0 if result["ok"] else 1
+        if args.script == "-":
+            return 0 if run_script(library, sys.stdin, sys.stdout, args.flush_every) else 1
+        with open(args.script, "r", encoding="utf-8") as file:
+            return 0 if run_script(library, file, sys.stdout, args.flush_every) else 1
+    finally:
+        library.close()
+
+
+def interactive(file_path: str = "data.json") -> None:
+    """
+        Интерактивная работа с библиотекой.
 
         Создаёт объект библиотеки, загружает данные из файла и предоставляет
         пользователю меню для управления библиотекой.
+
+        Args:
+            file_path (str): Путь к файлу с данными.
     """
-    library = Library() # Создаём объект библиотеки
+    library = Library(file_path=file_path, lazy=True) # Создаём объект библиотеки (файл читается по мере обращения)
     library.load_data() # Загружаем данные из файла
     while True:
         print("\n Библиотека:")
@@ -47,23 +239,30 @@ def main():
                     print("Ошибка: поле для поиска должно быть 'title', 'author' или 'year'.")
                     continue
                 data = input("Введите данные для поиска: ").strip()
-                results = library.search_books(data, field)
-                if results:
+                results = library.iter_search_books(data, field) # Результаты выводятся по мере нахождения
+                first = next(results, None)
+                if first is not None:
                     print("Найденные книги:")
+                    print(first)
                     for book in results:
                         print(book)
                 else:
                     print("Книг по вашему запросу не найдено.")
                 
                 pass
-            case "4": # Показ всех книг
-                books = library.books
-                if books:
-                    print("Книги в библиотеке:")
-                    for book in books:
-                        print(book)
-                else:
+            case "4": # Показ всех книг по страницам
+                books = library.iter_books() # Книги читаются из файла по мере показа страниц
+                page = list(itertools.islice(books, PAGE_SIZE))
+                if not page:
                     print("В библиотеке нет книг.")
+                    continue
+                print("Книги в библиотеке:")
+                while page:
+                    for book in page:
+                        print(book)
+                    page = list(itertools.islice(books, PAGE_SIZE))
+                    if page and input("Enter — следующая страница, q — в меню: ").strip().lower() == "q":
+                        break
             case "5": # Изменение статуса книги
                 try:
                     book_id = int(input("Введите Id книги: ").strip())
@@ -83,4 +282,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,131 @@
+from typing import Any, Dict, Iterator, Optional
+
+
+class NgramIndex:
+    """
+        Инвертированный n-граммный индекс для поиска подстроки по одному полю.
+
+        Для каждой книги хранится ключ поиска (нормализованное значение поля, см. book.search_key),
+        а для каждой n-граммы — книги, в ключе которых она встречается. Поиск
+        проверяет только книги из самого короткого списка n-грамм запроса.
+
+        Атрибуты:
+            n (int): Длина n-граммы.
+    """
+    def __init__(self, n: int = 3):
+        """
+            Инициализация пустого индекса.
+
+            Args:
+                n (int): Длина n-граммы. По умолчанию 3 (триграммы).
+        """
+        self.n = n
+        self._keys: Dict[int, str] = {} # ID книги -> ключ поиска
+        self._postings: Dict[str, Dict[int, None]] = {} # n-грамма -> ID книг (в порядке добавления)
+
+    def _ngrams(self, key: str) -> set[str]:
+        """
+            Множество n-грамм строки.
+
+            Args:
+                key (str): Строка.
+
+            Returns:
+                set[str]: Различные n-граммы строки.
+        """
+        return {key[i:i + self.n] for i in range(len(key) - self.n + 1)}
+
+    def add(self, book_id: int, key: str) -> None:
+        """
+            Добавление ключа книги в индекс.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+                key (str): Ключ поиска.
+        """
+        self.remove(book_id)
+        self._keys[book_id] = key
+        for gram in self._ngrams(key):
+            self._postings.setdefault(gram, {})[book_id] = None
+
+    def remove(self, book_id: int) -> None:
+        """
+            Удаление книги из индекса.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+        """
+        key = self._keys.pop(book_id, None)
+        if key is None:
+            return
+        for gram in self._ngrams(key):
+            posting = self._postings[gram]
+            del posting[book_id]
+            if not posting:
+                del self._postings[gram]
+
+    def clear(self) -> None:
+        """
+            Очистка индекса.
+        """
+        self._keys.clear()
+        self._postings.clear()
+
+    def key(self, book_id: int) -> Optional[str]:
+        """
+            Ключ поиска книги.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+
+            Returns:
+                Optional[str]: Ключ или None, если книги нет в индексе.
+        """
+        return self._keys.get(book_id)
+
+    def candidates(self, query: str) -> Dict[int, Any]:
+        """
+            Книги-кандидаты для запроса.
+
+            Args:
+                query (str): Подстрока для поиска.
+
+            Returns:
+                Dict[int, Any]: ID книг, ключи которых нужно проверить.
+        """
+        if len(query) < self.n:
+            return self._keys
+        postings = [self._postings.get(gram) for gram in self._ngrams(query)]
+        if not all(postings): # Какой-то n-граммы нет ни в одном ключе
+            return {}
+        return min(postings, key=len)
+
+    def count_candidates(self, query: str) -> int:
+        """
+            Количество книг, которые проверит поиск по запросу.
+
+            Args:
+                query (str): Подстрока для поиска.
+
+            Returns:
+                int: Количество книг-кандидатов.
+        """
+        return len(self.candidates(query))
+
+    def search(self, query: str) -> Iterator[int]:
+        """
+            Поиск книг, ключ которых содержит подстроку.
+
+            Запросы короче n проверяются по всем ключам; ключи уже
+            нормализованы, поэтому на каждый запрос ничего не пересчитывается.
+
+            Args:
+                query (str): Подстрока для поиска, нормализованная так же, как ключи.
+
+            Yields:
+                int: ID найденных книг в порядке их добавления.
+        """
+        keys = self._keys
+        for book_id in self.candidates(query):
+            if query in keys[book_id]:
+                yield book_id
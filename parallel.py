@@ -0,0 +1,145 @@
+import json
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from book import search_key
+from ngram_index import NgramIndex
+
+# В процессе-обработчике: индексы полей его части каталога по имени сегмента
+_SHARDS: Dict[str, Dict[str, NgramIndex]] = {}
+
+
+def _index_shard(name: str, size: int, fields: Tuple[str, ...]) -> None:
+    """
+        Построение индексов части каталога (выполняется в обработчике).
+
+        Строки части читаются из разделяемой памяти одним блоком JSON, индексы
+        остаются в обработчике для последующих поисков и главному процессу
+        не передаются.
+
+        Args:
+            name (str): Имя сегмента разделяемой памяти.
+            size (int): Размер данных в сегменте.
+            fields (Tuple[str, ...]): Поля индекса в порядке столбцов строк.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        rows = json.loads(bytes(memory.buf[:size]))
+    finally:
+        memory.close()
+    indexes = {field: NgramIndex() for field in fields}
+    for book_id, *values in rows:
+        for field, value in zip(fields, values):
+            if value is not None: # Пустые поля в поиск не попадают
+                indexes[field].add(book_id, search_key(value))
+    _SHARDS.clear() # Обработчик отвечает за одну часть; старые индексы не нужны
+    _SHARDS[name] = indexes
+
+
+def _search_shard(name: str, field: str, key: str) -> Optional[List[int]]:
+    """
+        Поиск по индексу части каталога (выполняется в обработчике).
+
+        Returns:
+            Optional[List[int]]: ID найденных книг или None, если индекса части
+                в обработчике нет (например, обработчик был перезапущен).
+    """
+    indexes = _SHARDS.get(name)
+    if indexes is None:
+        return None
+    return list(indexes[field].search(key))
+
+
+class ShardPool:
+    """
+        Пул процессов, между которыми каталог разделён на части.
+
+        Каждая часть закреплена за своим процессом: строки части передаются
+        ему один раз через разделяемую память (multiprocessing.shared_memory),
+        процесс строит и хранит триграммные индексы части, а поиски
+        передают только поле и запрос. Части идут подряд в порядке книг
+        библиотеки, поэтому объединение результатов по порядку частей даёт
+        тот же порядок, что и поиск в одном процессе.
+
+        Атрибуты:
+            workers (int): Количество процессов (частей каталога).
+    """
+    def __init__(self, workers: int):
+        """
+            Инициализация пула; процессы запускаются при первом обращении.
+
+            Args:
+                workers (int): Количество процессов.
+        """
+        self.workers = workers
+        self._executors: List[ProcessPoolExecutor] = []
+        self._names: List[str] = [] # Сегменты текущих частей (ключи индексов в обработчиках)
+
+    def _pool(self) -> List[ProcessPoolExecutor]:
+        if not self._executors:
+            self._executors = [ProcessPoolExecutor(max_workers=1) for _ in range(self.workers)]
+        return self._executors
+
+    def index(self, rows: Sequence[list], fields: Tuple[str, ...]) -> None:
+        """
+            Распределение строк каталога по процессам и построение индексов частей.
+
+            Args:
+                rows (Sequence[list]): Строки [id, значение поля, ...] в порядке книг.
+                fields (Tuple[str, ...]): Поля индекса в порядке столбцов.
+        """
+        executors = self._pool()
+        step = -(-len(rows) // self.workers) or 1
+        segments, futures = [], []
+        try:
+            for executor, start in zip(executors, range(0, len(rows), step)):
+                data = json.dumps(rows[start:start + step], ensure_ascii=False).encode("utf-8")
+                memory = shared_memory.SharedMemory(create=True, size=len(data))
+                segments.append(memory)
+                memory.buf[:len(data)] = data
+                futures.append(executor.submit(_index_shard, memory.name, len(data), fields))
+            for future in futures:
+                future.result()
+        finally:
+            for memory in segments: # Обработчики уже прочитали свои части
+                memory.close()
+                memory.unlink()
+        self._names = [memory.name for memory in segments]
+
+    def search(self, field: str, key: str) -> Optional[List[int]]:
+        """
+            Параллельный поиск по всем частям.
+
+            Args:
+                field (str): Поле книги.
+                key (str): Ключ запроса (search_key).
+
+            Returns:
+                Optional[List[int]]: ID найденных книг в порядке книг или None,
+                    если пул остановлен или какой-то процесс потерял индекс
+                    своей части (тогда поиск выполняет вызывающий процесс).
+        """
+        if not self._executors:
+            return None
+        try:
+            futures = [executor.submit(_search_shard, name, field, key)
+                       for executor, name in zip(self._executors, self._names)]
+            results = [future.result() for future in futures]
+        except BrokenExecutor:
+            return None
+        found: List[int] = []
+        for ids in results:
+            if ids is None:
+                return None
+            found.extend(ids)
+        return found
+
+    def close(self) -> None:
+        """
+            Остановка процессов пула.
+        """
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
+        self._names = []
@@ -0,0 +1,102 @@
+import copy
+from typing import Any, Optional
+
+from book import Book, BookStatus, search_key
+
+ORDER_FIELDS = ("id", "title", "author", "year") # Поля для сортировки результатов
+
+
+class Query:
+    """
+        Запрос к библиотеке из нескольких условий с сортировкой и страницами.
+
+        Все заданные условия должны выполняться одновременно. Выполняет
+        запрос Library.query: планировщик начинает с самого избирательного
+        индекса, а остальные условия проверяет у книг-кандидатов.
+
+        Атрибуты:
+            author (Optional[str]): Подстрока автора (без учёта регистра и различий ё/е).
+            author_key (Optional[str]): Ключ поиска автора (search_key).
+            year_from (Optional[int]): Минимальный год издания включительно.
+            year_to (Optional[int]): Максимальный год издания включительно.
+            status (Optional[BookStatus]): Статус книги.
+            title (Optional[str]): Точное название книги.
+            order_by (str): Поле сортировки: "id", "title", "author" или "year".
+            descending (bool): Сортировка по убыванию.
+            offset (int): Количество пропускаемых результатов.
+            limit (Optional[int]): Максимальное количество результатов или None.
+    """
+    def __init__(self, author: Optional[str] = None, year_from: Optional[int] = None,
+                 year_to: Optional[int] = None, status: Optional[Any] = None, title: Optional[str] = None,
+                 order_by: str = "id", descending: bool = False, offset: int = 0, limit: Optional[int] = None):
+        """
+            Инициализация запроса.
+
+            Args:
+                author (Optional[str]): Подстрока автора.
+                year_from (Optional[int]): Минимальный год издания включительно.
+                year_to (Optional[int]): Максимальный год издания включительно.
+                status (Optional[Any]): Статус книги (BookStatus или его значение).
+                title (Optional[str]): Точное название книги.
+                order_by (str): Поле сортировки. По умолчанию "id".
+                descending (bool): Сортировка по убыванию.
+                offset (int): Количество пропускаемых результатов.
+                limit (Optional[int]): Максимальное количество результатов.
+
+            Raises:
+                ValueError: Если статус, поле сортировки, offset или limit некорректны.
+        """
+        if order_by not in ORDER_FIELDS:
+            raise ValueError(f"Сортировка возможна по полям: {', '.join(ORDER_FIELDS)}")
+        if offset < 0 or (limit is not None and limit < 0):
+            raise ValueError("offset и limit не могут быть отрицательными")
+        self.author = author
+        self.author_key = search_key(author) if author else None # Запрос нормализуется один раз
+        self.year_from = year_from
+        self.year_to = year_to
+        self.status = BookStatus(status) if status is not None else None
+        self.title = title
+        self.order_by = order_by
+        self.descending = descending
+        self.offset = offset
+        self.limit = limit
+
+    def matches(self, book: Book, author_key: Optional[str] = None) -> bool:
+        """
+            Проверка всех условий запроса.
+
+            Args:
+                book (Book): Проверяемая книга.
+                author_key (Optional[str]): Готовый ключ поиска автора книги
+                    (из индекса); если не передан, вычисляется.
+
+            Returns:
+                bool: True, если книга удовлетворяет запросу.
+        """
+        if self.title is not None and book.title != self.title:
+            return False
+        if self.status is not None and book.status != self.status:
+            return False
+        if self.year_from is not None and book.year < self.year_from:
+            return False
+        if self.year_to is not None and book.year > self.year_to:
+            return False
+        if self.author_key is None:
+            return True
+        return self.author_key in (author_key if author_key is not None else search_key(book.author))
+
+    def next_page(self) -> 'Query':
+        """
+            Запрос следующей страницы (при заданном limit).
+
+            Returns:
+                Query: Тот же запрос со смещением на одну страницу вперёд.
+
+            Raises:
+                ValueError: Если limit не задан.
+        """
+        if self.limit is None:
+            raise ValueError("Страницы доступны только при заданном limit")
+        page = copy.copy(self)
+        page.offset = self.offset + self.limit
+        return page
@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class SearchCache:
+    """
+        LRU-кэш результатов поиска ограниченного размера.
+
+        Каждый результат хранится вместе с поколением данных, на которых он
+        получен. Если поколение изменилось (библиотека изменилась так, что
+        результат мог устареть), запись считается промахом и вычисляется
+        заново. Кэш отдаёт и хранит копии списков, поэтому изменение
+        полученного списка не портит кэш.
+
+        Атрибуты:
+            max_size (int): Максимальное количество результатов в кэше.
+            hits (int): Количество попаданий.
+            misses (int): Количество промахов (в том числе устаревших записей).
+            evictions (int): Количество вытесненных записей.
+    """
+    def __init__(self, max_size: int = 256):
+        """
+            Инициализация пустого кэша.
+
+            Args:
+                max_size (int): Максимальное количество результатов в кэше.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock() # Поиски читают кэш параллельно
+
+    def get(self, key: Hashable, generation: Hashable) -> Optional[List[Any]]:
+        """
+            Получение результата из кэша.
+
+            Args:
+                key (Hashable): Ключ запроса.
+                generation (Hashable): Текущее поколение данных.
+
+            Returns:
+                Optional[List[Any]]: Копия результата или None при промахе.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: Hashable, generation: Hashable, value: List[Any]) -> None:
+        """
+            Сохранение результата в кэш.
+
+            Args:
+                key (Hashable): Ключ запроса.
+                generation (Hashable): Поколение данных, на которых получен результат.
+                value (List[Any]): Результат (сохраняется копия).
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (generation, list(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size: # Вытесняем давно не использованные
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+            Очистка кэша (статистика сохраняется).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+            Статистика кэша.
+
+            Returns:
+                Dict[str, int]: Попадания, промахи, вытеснения, текущий и
+                    максимальный размер.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+            }
@@ -0,0 +1,616 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from book import Book, BookStatus, search_key
+from instrumentation import Instrumentation, instrumented
+from library import SEARCH_FIELDS, Library
+from query import Query
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS books (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        author TEXT NOT NULL,
+        year INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        title_key TEXT NOT NULL,
+        author_key TEXT NOT NULL,
+        year_key TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS books_title ON books(title);
+    CREATE INDEX IF NOT EXISTS books_author ON books(author);
+    CREATE INDEX IF NOT EXISTS books_year ON books(year);
+    CREATE INDEX IF NOT EXISTS books_status ON books(status);
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO meta (key, value) VALUES ('next_id', (SELECT coalesce(max(id), 0) + 1 FROM books));
+    CREATE TABLE IF NOT EXISTS reserved (
+        start INTEGER PRIMARY KEY,
+        stop INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS changes (
+        revision INTEGER PRIMARY KEY,
+        change TEXT NOT NULL
+    );
+    INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', 0);
+    INSERT OR IGNORE INTO meta (key, value) VALUES ('changes_start', 0);
+"""
+
+_FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title_key, author_key, year_key,
+        content='books', content_rowid='id', tokenize='trigram case_sensitive 1'
+    );
+    CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts(rowid, title_key, author_key, year_key)
+        VALUES (new.id, new.title_key, new.author_key, new.year_key);
+    END;
+    CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, title_key, author_key, year_key)
+        VALUES ('delete', old.id, old.title_key, old.author_key, old.year_key);
+    END;
+"""
+
+_KEYS_VERSION = 1 # Версия ключей поиска (PRAGMA user_version): 1 — search_key
+
+_COLUMNS = "b.id, b.title, b.author, b.year, b.status"
+_INSERT = ("INSERT INTO books (id, title, author, year, status, title_key, author_key, year_key) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class SqliteLibrary(Library):
+    """
+        Библиотека, хранящая книги в базе SQLite.
+
+        Книги не загружаются в память целиком: каждая операция выполняется
+        запросом к базе. Следующий свободный ID хранится в таблице meta и
+        выдаётся атомарно, поэтому ID удалённых книг не выдаются повторно;
+        незанятые блоки ID из reserve_ids хранятся в таблице reserved.
+        Лента изменений (changes_since) хранится в таблице changes и
+        пополняется в той же транзакции, что и изменение книг, поэтому
+        ревизии общие для всех процессов с этой базой и откатываются вместе
+        с данными. Все запросы параметризованы, поэтому sqlite3 готовит
+        каждый из них один раз и берёт из кэша подготовленных выражений.
+        Поиск подстроки выполняется в SQL по полям с ключами поиска
+        (book.search_key), а при наличии FTS5 с триграммным токенизатором —
+        через полнотекстовый индекс. Публичный интерфейс совпадает с Library.
+        Соединение общее для всех потоков: чтения выполняются под блокировкой
+        на чтение, изменения — под блокировкой на запись; между процессами
+        изменения упорядочивает сама SQLite. Изменение с ошибкой откатывается
+        целиком и не оставляет открытой транзакции.
+
+        Атрибуты:
+            file_path (str): Путь к файлу базы данных.
+            fts (bool): Используется ли полнотекстовый индекс FTS5.
+    """
+    def __init__(self, file_path: str = "data.db", instrumentation: Optional[Instrumentation] = None,
+                 change_feed_size: int = 10000):
+        """
+            Инициализация библиотеки с файлом базы данных.
+
+            Args:
+                file_path (str): Путь к файлу базы данных. По умолчанию "data.db".
+                instrumentation (Optional[Instrumentation]): Сборщик статистики
+                    или None (статистика выключена).
+                change_feed_size (int): Количество последних изменений в
+                    таблице changes (см. changes_since).
+        """
+        super().__init__(file_path, instrumentation=instrumentation, change_feed_size=change_feed_size)
+        self.fts = False
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """
+            Соединение с базой; открывается и размечается при первом обращении.
+        """
+        if self._db is None:
+            with self._writer:
+                if self._db is None:
+                    db = sqlite3.connect(self.file_path, check_same_thread=False)
+                    db.execute("PRAGMA journal_mode=WAL") # Читатели не блокируются писателем
+                    db.executescript(_SCHEMA)
+                    try:
+                        db.executescript(_FTS_SCHEMA)
+                        self.fts = True
+                    except sqlite3.OperationalError: # SQLite собран без FTS5 или без триграмм
+                        self.fts = False
+                    if db.execute("PRAGMA user_version").fetchone()[0] < _KEYS_VERSION:
+                        self._rebuild_keys(db)
+                    self._db = db
+        return self._db
+
+    def _rebuild_keys(self, db: sqlite3.Connection) -> None:
+        """
+            Пересчёт ключей поиска в базе, созданной до нормализации ключей
+            (ключи были значениями в нижнем регистре).
+
+            Args:
+                db (sqlite3.Connection): Открытое соединение.
+        """
+        db.create_function("search_key", 1, search_key, deterministic=True)
+        db.execute("UPDATE books SET title_key = search_key(title), author_key = search_key(author), "
+                   "year_key = search_key(year)")
+        if self.fts: # Триггеры FTS не следят за UPDATE — перестраиваем индекс
+            db.execute("INSERT INTO books_fts(books_fts) VALUES ('rebuild')")
+        db.execute(f"PRAGMA user_version = {_KEYS_VERSION}")
+        db.commit()
+
+    def close(self) -> None:
+        """
+            Закрытие соединения с базой.
+        """
+        with self._lock.write():
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        super().close()
+
+    @staticmethod
+    def _row_to_book(row: tuple) -> Book:
+        """
+            Создание книги из строки таблицы.
+        """
+        book_id, title, author, year, status = row
+        book = Book(title, author, year)
+        book.id = book_id
+        book.status = status
+        return book
+
+    @staticmethod
+    def _keys(title: str, author: str, year: int) -> tuple:
+        """
+            Ключи поиска для полей книги.
+        """
+        return search_key(title), search_key(author), search_key(year)
+
+    def _rows(self, sql: str, params: tuple = ()) -> Iterator[tuple]:
+        """
+            Потоковое чтение строк запроса частями под блокировкой на чтение.
+
+            Args:
+                sql (str): Запрос.
+                params (tuple): Параметры запроса.
+
+            Yields:
+                tuple: Очередная строка результата.
+        """
+        with self._lock.read():
+            cursor = self._connection.execute(sql, params)
+            rows = cursor.fetchmany(512)
+        while rows:
+            yield from rows
+            with self._lock.read():
+                rows = cursor.fetchmany(512)
+
+    def _record(self, record: Dict[str, Any]) -> None:
+        """
+            Запись изменения в ленту (таблицу changes) в текущей транзакции
+            (вызывается под блокировкой на запись). Самые старые изменения
+            сверх change_feed_size удаляются.
+
+            Args:
+                record (Dict[str, Any]): Изменение: поле "op" и данные изменения.
+        """
+        connection = self._connection
+        revision = connection.execute(
+            "UPDATE meta SET value = value + 1 WHERE key = 'revision' RETURNING value").fetchone()[0]
+        connection.execute("INSERT INTO changes (revision, change) VALUES (?, ?)",
+                           (revision, json.dumps(record, ensure_ascii=False)))
+        start = revision - self.change_feed.max_size # Изменения после start остаются в ленте
+        if connection.execute("UPDATE meta SET value = ? WHERE key = 'changes_start' AND value < ?",
+                              (start, start)).rowcount:
+            connection.execute("DELETE FROM changes WHERE revision <= ?", (start,))
+
+    @contextmanager
+    def _mutation(self) -> Iterator[sqlite3.Connection]:
+        """
+            Изменение под блокировкой на запись: вне пакета — в отдельной
+            транзакции, которая фиксируется или откатывается при ошибке,
+            внутри пакета — в точке сохранения, откат которой не затрагивает
+            остальные изменения пакета.
+
+            Yields:
+                sqlite3.Connection: Соединение с базой.
+        """
+        with self._lock.write():
+            connection = self._connection
+            if not self._batch_depth:
+                try:
+                    yield connection
+                    connection.commit()
+                except BaseException:
+                    connection.rollback() # Иначе транзакция держит базу и попадёт в следующую фиксацию
+                    raise
+                return
+            if not connection.in_transaction: # Внешняя точка сохранения сама фиксировала бы изменения
+                connection.execute("BEGIN")
+            connection.execute("SAVEPOINT mutation")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK TO mutation")
+                raise
+            finally:
+                connection.execute("RELEASE mutation")
+
+    @property
+    def books(self) -> List[Book]:
+        """
+            Возвращение списка книг в порядке ID.
+
+            Returns:
+                List[Book]: Список книг в библиотеке.
+        """
+        return list(self.iter_books())
+
+    @books.setter
+    def books(self, books: List[Book]) -> None:
+        """
+            Замена всех книг библиотеки.
+
+            Args:
+                books (List[Book]): Новый список книг.
+        """
+        with self._mutation() as connection:
+            connection.execute("DELETE FROM books")
+            connection.executemany(_INSERT, (
+                (book.id, book.title, book.author, book.year, book.status.value,
+                 *self._keys(book.title, book.author, book.year)) for book in books))
+            connection.execute("UPDATE meta SET value = max(value, (SELECT coalesce(max(id), 0) + 1 FROM books)) "
+                               "WHERE key = 'next_id'")
+            revision = connection.execute( # Книги заменены не через ленту — история прерывается
+                "UPDATE meta SET value = value + 1 WHERE key = 'revision' RETURNING value").fetchone()[0]
+            connection.execute("UPDATE meta SET value = ? WHERE key = 'changes_start'", (revision,))
+            connection.execute("DELETE FROM changes")
+
+    def get_book(self, book_id: int) -> Optional[Book]:
+        """
+            Поиск книги по ID через первичный ключ.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+
+            Returns:
+                Optional[Book]: Книга или None, если книга не найдена.
+        """
+        with self._lock.read():
+            row = self._connection.execute(f"SELECT {_COLUMNS} FROM books AS b WHERE b.id = ?", (book_id,)).fetchone()
+        return self._row_to_book(row) if row is not None else None
+
+    def iter_books(self) -> Iterator[Book]:
+        """
+            Перебор книг в порядке ID без загрузки всей таблицы в память.
+
+            Yields:
+                Book: Очередная книга.
+        """
+        for row in self._rows(f"SELECT {_COLUMNS} FROM books AS b ORDER BY b.id"):
+            yield self._row_to_book(row)
+
+    def load_data(self) -> None:
+        """
+            Открытие базы данных; книги в память не загружаются.
+        """
+        self._connection
+
+    @instrumented("save_data")
+    def save_data(self) -> None:
+        """
+            Фиксация текущей транзакции.
+        """
+        with self._lock.write():
+            self._connection.commit()
+
+    @contextmanager
+    def batch(self) -> Iterator['SqliteLibrary']:
+        """
+            Пакет мутаций в одной транзакции: фиксация в конце или откат при ошибке.
+
+            Пакеты разных потоков выполняются по одному; вложенный пакет (в
+            том же потоке) становится частью внешнего.
+
+            Yields:
+                SqliteLibrary: Эта же библиотека.
+        """
+        connection = self._connection # Открываем базу до блокировок: открытие берёт _writer
+        with self._writer: # Глубину пакета видит только поток, владеющий пакетом
+            if self._batch_depth:
+                self._batch_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._batch_depth -= 1
+                return
+            with self._lock.write():
+                self._batch_depth = 1
+                try:
+                    yield self
+                    connection.commit()
+                except BaseException:
+                    connection.rollback()
+                    raise
+                finally:
+                    self._batch_depth = 0
+
+    @instrumented("add_book")
+    def add_book(self, title: str, author: str, year: int, book_id: Optional[int] = None) -> Book:
+        """
+            Добавление книги в базу.
+
+            Args:
+                title (str): Название книги.
+                author (str): Автор книги.
+                year (int): Год издания.
+                book_id (Optional[int]): ID из блока, выданного reserve_ids.
+
+            Returns:
+                Book: Экземпляр добавленной книги.
+
+            Raises:
+                ValueError: Если book_id не был выдан reserve_ids или уже занят.
+        """
+        new_book = Book(title, author, year)
+        with self._mutation() as connection:
+            if book_id is None: # Выдаём следующий ID в той же транзакции, что и вставку
+                book_id = connection.execute(
+                    "UPDATE meta SET value = value + 1 WHERE key = 'next_id' RETURNING value - 1").fetchone()[0]
+            elif self.get_book(book_id) is not None or not self._take_reserved(book_id):
+                raise ValueError(f"ID {book_id} не зарезервирован или уже занят")
+            connection.execute(_INSERT, (book_id, title, author, year, new_book.status.value,
+                                         *self._keys(title, author, year)))
+            new_book.id = book_id
+            self._record({"op": "add", "book": new_book.to_dict()})
+        return new_book
+
+    def _take_reserved(self, book_id: int) -> bool:
+        """
+            Занятие ID из зарезервированного блока в текущей транзакции
+            (вызывается под блокировкой на запись).
+
+            Args:
+                book_id (int): ID книги.
+
+            Returns:
+                bool: True, если ID был зарезервирован и не занят.
+        """
+        connection = self._connection
+        row = connection.execute("SELECT start, stop FROM reserved WHERE start <= ? ORDER BY start DESC LIMIT 1",
+                                 (book_id,)).fetchone()
+        if row is None or book_id >= row[1]:
+            return False
+        start, stop = row
+        connection.execute("DELETE FROM reserved WHERE start = ?", (start,))
+        connection.executemany("INSERT INTO reserved (start, stop) VALUES (?, ?)",
+                               [block for block in ((start, book_id), (book_id + 1, stop)) if block[0] < block[1]])
+        return True
+
+    def _stored_next_id(self) -> int:
+        """
+            Следующий свободный ID из таблицы meta.
+        """
+        with self._lock.read():
+            return self._connection.execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()[0]
+
+    @property
+    def next_id(self) -> int:
+        """
+            Следующий свободный ID.
+
+            Returns:
+                int: ID, который получит следующая добавленная книга.
+        """
+        return self._stored_next_id()
+
+    def reserve_ids(self, count: int) -> range:
+        """
+            Резервирование блока ID (см. Library.reserve_ids).
+
+            Args:
+                count (int): Количество ID.
+
+            Returns:
+                range: Зарезервированные ID.
+
+            Raises:
+                ValueError: Если count отрицательный.
+        """
+        if count < 0:
+            raise ValueError("Количество ID не может быть отрицательным")
+        with self._mutation() as connection:
+            end = connection.execute(
+                "UPDATE meta SET value = value + ? WHERE key = 'next_id' RETURNING value", (count,)).fetchone()[0]
+            if count:
+                connection.execute("INSERT INTO reserved (start, stop) VALUES (?, ?)", (end - count, end))
+        return range(end - count, end)
+
+    @property
+    def revision(self) -> int:
+        """
+            Номер текущей ревизии данных из таблицы meta.
+
+            Returns:
+                int: Номер ревизии последнего изменения.
+        """
+        with self._lock.read():
+            return self._connection.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()[0]
+
+    def changes_since(self, revision: int) -> List[Dict[str, Any]]:
+        """
+            Изменения после ревизии из таблицы changes (см. Library.changes_since).
+
+            Args:
+                revision (int): Номер ревизии копии потребителя.
+
+            Returns:
+                List[Dict[str, Any]]: Изменения по порядку.
+
+            Raises:
+                ValueError: Если изменения после ревизии недоступны — нужна
+                    полная синхронизация.
+        """
+        with self._lock.read():
+            connection = self._connection
+            start, current = connection.execute(
+                "SELECT (SELECT value FROM meta WHERE key = 'changes_start'), "
+                "(SELECT value FROM meta WHERE key = 'revision')").fetchone()
+            rows = connection.execute("SELECT revision, change FROM changes WHERE revision > ? ORDER BY revision",
+                                      (revision,)).fetchall()
+        if not start <= revision <= current or rows and rows[0][0] != revision + 1: # Второе — ленту урезал другой процесс
+            raise ValueError(f"Изменения после ревизии {revision} недоступны "
+                             f"(доступны после ревизий {start}..{current}), нужна полная синхронизация")
+        return [{"revision": number, **json.loads(change)} for number, change in rows]
+
+    @instrumented("update_book_status")
+    def update_book_status(self, book_id: int, status: str) -> bool:
+        """
+            Изменение статуса книги.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+                status (str): Новый статус книги (должен быть допустимым).
+
+            Returns:
+                bool: True, если статус обновлён успешно; False, если книга или
+                    статус не найдены.
+        """
+        if status not in BookStatus.list(): # Проверяем допустимость статуса
+            return False
+        with self._mutation() as connection:
+            cursor = connection.execute("UPDATE books SET status = ? WHERE id = ?", (status, book_id))
+            if cursor.rowcount:
+                self._record({"op": "status", "id": book_id, "status": status})
+        return cursor.rowcount > 0
+
+    @instrumented("remove_book")
+    def remove_book(self, book_id: int) -> bool:
+        """
+            Удаление книги из базы.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+
+            Returns:
+                bool: True, если книга удалена; False, если книга не найдена.
+        """
+        with self._mutation() as connection:
+            cursor = connection.execute("DELETE FROM books WHERE id = ?", (book_id,))
+            if cursor.rowcount:
+                self._record({"op": "remove", "id": book_id})
+        return cursor.rowcount > 0
+
+    @instrumented("search_books")
+    def search_books(self, data: str, field: str) -> List[Book]:
+        """
+            Поиск книг по заданному полю запросом к базе.
+
+            Args:
+                data (str): Значение для поиска.
+                field (str): Поле книги, по которому производится поиск.
+
+            Returns:
+                List[Book]: Список книг, соответствующих критерию поиска.
+        """
+        found = list(self.iter_search_books(data, field))
+        if self.instrumentation is not None:
+            self.instrumentation.note(books_found=len(found))
+        return found
+
+    def iter_search_books(self, data: str, field: str) -> Iterator[Book]:
+        """
+            Поиск книг по заданному полю с выдачей результатов по мере чтения из базы.
+
+            Args:
+                data (str): Значение для поиска.
+                field (str): Поле книги, по которому производится поиск.
+
+            Yields:
+                Book: Очередная найденная книга.
+        """
+        data = search_key(data) # Запрос нормализуется один раз
+        if field not in SEARCH_FIELDS: # Для остальных полей — перебор, как в Library
+            yield from (book for book in self.iter_books() if self._matches(book, data, field))
+            return
+        key = f"{field}_key"
+        if self.fts and len(data) >= 3: # Кандидаты из триграммного индекса, проверка — instr
+            phrase = '"' + data.replace('"', '""') + '"'
+            rows = self._rows(
+                f"SELECT {_COLUMNS} FROM books_fts JOIN books AS b ON b.id = books_fts.rowid "
+                f"WHERE books_fts MATCH ? AND instr(b.{key}, ?) > 0 ORDER BY b.id",
+                (f"{key} : {phrase}", data))
+        else:
+            rows = self._rows(
+                f"SELECT {_COLUMNS} FROM books AS b WHERE instr(b.{key}, ?) > 0 ORDER BY b.id", (data,))
+        for row in rows:
+            yield self._row_to_book(row)
+
+    @staticmethod
+    def _query_sql(query: Query, columns: str) -> Tuple[str, list]:
+        """
+            Запрос SQL для Query (план выбирает SQLite по индексам таблицы).
+
+            Args:
+                query (Query): Запрос.
+                columns (str): Выбираемые столбцы.
+
+            Returns:
+                Tuple[str, list]: Текст запроса и его параметры.
+        """
+        conditions, params = [], []
+        if query.title is not None:
+            conditions.append("b.title = ?")
+            params.append(query.title)
+        if query.status is not None:
+            conditions.append("b.status = ?")
+            params.append(query.status.value)
+        if query.year_from is not None:
+            conditions.append("b.year >= ?")
+            params.append(query.year_from)
+        if query.year_to is not None:
+            conditions.append("b.year <= ?")
+            params.append(query.year_to)
+        if query.author:
+            conditions.append("instr(b.author_key, ?) > 0")
+            params.append(query.author_key)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = " DESC" if query.descending else ""
+        order = f"b.id{direction}" if query.order_by == "id" else f"b.{query.order_by}{direction}, b.id{direction}"
+        return f"SELECT {columns} FROM books AS b{where} ORDER BY {order}", params
+
+    def query(self, query: Optional[Query] = None, **conditions: Any) -> Iterator[Book]:
+        """
+            Поиск книг по нескольким условиям запросом к базе (см. Library.query).
+
+            Args:
+                query (Optional[Query]): Запрос.
+                **conditions: Параметры Query, если запрос не передан.
+
+            Returns:
+                Iterator[Book]: Книги страницы запроса, читаются из базы частями.
+        """
+        if query is None:
+            query = Query(**conditions)
+        sql, params = self._query_sql(query, _COLUMNS)
+        rows = self._rows(f"{sql} LIMIT ? OFFSET ?",
+                          (*params, query.limit if query.limit is not None else -1, query.offset))
+        return (self._row_to_book(row) for row in rows)
+
+    def explain(self, query: Query) -> Tuple[str, int]:
+        """
+            План запроса SQLite.
+
+            Args:
+                query (Query): Запрос.
+
+            Returns:
+                Tuple[str, int]: План (EXPLAIN QUERY PLAN) и количество найденных книг.
+        """
+        sql, params = self._query_sql(query, "b.id")
+        with self._lock.read():
+            plan = self._connection.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            count = self._connection.execute(f"SELECT count(*) FROM ({sql})", params).fetchone()[0]
+        return "; ".join(row[-1] for row in plan), count
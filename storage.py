@@ -0,0 +1,360 @@
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from book import Book, BookStatus
+from json_stream import iter_books
+
+
+class StorageFormatError(ValueError):
+    """
+        Файл данных повреждён или имеет неверный формат.
+    """
+
+
+_RECORD_ERRORS = (KeyError, TypeError, ValueError, AttributeError) # Ошибки Book.from_dict на некорректной записи
+
+
+def _book_from_dict(file_path: str, data: Any) -> Book:
+    """
+        Создание книги из записи файла.
+
+        Raises:
+            StorageFormatError: Если запись некорректна (нет поля, неверный статус и т. п.).
+    """
+    try:
+        return Book.from_dict(data)
+    except _RECORD_ERRORS as error:
+        raise StorageFormatError(f"Некорректная запись книги в файле {file_path}: {data!r} ({error!r})") from error
+
+
+class Storage(ABC):
+    """
+        Формат хранения снимка библиотеки.
+
+        Библиотека читает и записывает снимок через выбранный формат
+        (Library(storage=...)), поэтому форматы взаимозаменяемы. Кроме книг
+        снимок хранит следующий свободный ID ("next_id"), чтобы ID удалённых
+        книг не выдавались повторно, ещё не занятые блоки ID, выданные
+        reserve_ids ("reserved"), и номер ревизии данных в ленте изменений
+        ("revision"). Новый формат реализует iter_books и save (и при
+        необходимости более быстрый load).
+    """
+    def load(self, file_path: str, timings: Optional[Dict[str, float]] = None,
+             meta: Optional[Dict[str, Any]] = None) -> List[Book]:
+        """
+            Чтение всех книг из файла.
+
+            Args:
+                file_path (str): Путь к файлу.
+                timings (Optional[Dict[str, float]]): Если передан, формат
+                    записывает сюда время этапов чтения в секундах: разбор
+                    файла ("parse_seconds") и создание книг ("build_seconds").
+                    Потоковые форматы разбирают файл вместе с созданием книг,
+                    и всё время учитывается как "build_seconds".
+                meta (Optional[Dict[str, Any]]): Если передан, сюда записываются
+                    данные снимка кроме книг ("next_id", "reserved" и
+                    "revision"; в старых файлах их нет).
+
+            Returns:
+                List[Book]: Книги в порядке записи.
+
+            Raises:
+                FileNotFoundError: Если файл отсутствует.
+                StorageFormatError: Если файл повреждён.
+        """
+        if timings is None:
+            return list(self.iter_books(file_path, meta))
+        start = time.perf_counter()
+        books = list(self.iter_books(file_path, meta))
+        timings["build_seconds"] = time.perf_counter() - start
+        return books
+
+    @abstractmethod
+    def iter_books(self, file_path: str, meta: Optional[Dict[str, Any]] = None) -> Iterator[Book]:
+        """
+            Потоковое чтение книг из файла.
+
+            Args:
+                file_path (str): Путь к файлу.
+                meta (Optional[Dict[str, Any]]): Если передан, сюда записываются
+                    данные снимка кроме книг; они известны до первой книги
+                    (в файлах прежних версий — после чтения всех книг).
+
+            Yields:
+                Book: Очередная книга.
+
+            Raises:
+                FileNotFoundError: Если файл отсутствует.
+                StorageFormatError: Если файл повреждён.
+        """
+
+    @abstractmethod
+    def save(self, file_path: str, books: Iterable[Book], next_id: Optional[int] = None,
+             reserved: Sequence[Sequence[int]] = (), revision: int = 0) -> None:
+        """
+            Запись книг в файл.
+
+            Args:
+                file_path (str): Путь к файлу.
+                books (Iterable[Book]): Книги для записи.
+                next_id (Optional[int]): Следующий свободный ID или None, если неизвестен.
+                reserved (Sequence[Sequence[int]]): Незанятые зарезервированные
+                    блоки ID [начало, конец).
+                revision (int): Номер ревизии данных в ленте изменений.
+        """
+
+
+class JsonStorage(Storage):
+    """
+        Снимок в формате JSON (data.json): объект {"next_id": N, "revision": R,
+        "books": [...]} (и "reserved": [[начало, конец], ...], если есть
+        зарезервированные блоки ID), где books — словари Book.to_dict. Поля
+        кроме книг записываются перед ними, чтобы потоковое чтение знало их
+        до первой книги. Читается и старый формат — массив книг без next_id.
+    """
+    def load(self, file_path: str, timings: Optional[Dict[str, float]] = None,
+             meta: Optional[Dict[str, Any]] = None) -> List[Book]:
+        start = time.perf_counter() if timings is not None else 0.0
+        try:
+            with open(file_path, "r", encoding="utf-8") as file:
+                data = json.load(file) # Загружаем данные из файла
+        except json.JSONDecodeError as error:
+            raise StorageFormatError(f"Некорректный JSON в файле {file_path}: {error}") from error
+        if isinstance(data, dict): # Объект со списком книг и next_id
+            if not isinstance(data.get("books"), list):
+                raise StorageFormatError(f"В файле {file_path} нет списка книг")
+            if meta is not None:
+                meta.update((key, value) for key, value in data.items() if key != "books")
+            data = data["books"]
+        if timings is None:
+            return [_book_from_dict(file_path, book) for book in data]
+        parsed = time.perf_counter()
+        books = [_book_from_dict(file_path, book) for book in data]
+        timings["parse_seconds"] = parsed - start
+        timings["build_seconds"] = time.perf_counter() - parsed
+        return books
+
+    def iter_books(self, file_path: str, meta: Optional[Dict[str, Any]] = None) -> Iterator[Book]:
+        try:
+            yield from iter_books(file_path, meta=meta)
+        except json.JSONDecodeError as error:
+            raise StorageFormatError(f"Некорректный JSON в файле {file_path}: {error}") from error
+        except _RECORD_ERRORS as error: # Book.from_dict на некорректной записи
+            raise StorageFormatError(f"Некорректная запись книги в файле {file_path}: {error!r}") from error
+
+    def save(self, file_path: str, books: Iterable[Book], next_id: Optional[int] = None,
+             reserved: Sequence[Sequence[int]] = (), revision: int = 0) -> None:
+        data: Any = [dict(sorted(book.to_dict().items())) for book in books] # Сохраняем список книг (ключи по алфавиту)
+        if next_id is not None:
+            meta: Dict[str, Any] = {"next_id": next_id}
+            if reserved:
+                meta["reserved"] = [list(block) for block in reserved]
+            meta["revision"] = revision
+            data = {**meta, "books": data} # Книги последними: поля снимка известны до первой книги
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(
+                data,
+                file,
+                indent=4, # Форматируем JSON с отступами
+                ensure_ascii=False # Оставляем символы Unicode
+                )
+
+
+class BinaryStorage(Storage):
+    """
+        Компактный бинарный колоночный снимок.
+
+        Формат (little-endian, каждая колонка выровнена на 8 байт):
+            заголовок: MAGIC, количество книг n, количество строк m,
+                следующий свободный ID (0 — неизвестен), количество
+                зарезервированных блоков ID r, номер ревизии данных;
+            блоки ID (int64 × 2r, пары начало и конец);
+            id (int64 × n), year (int64 × n), status (uint8 × n, номер в BookStatus);
+            title, author (uint32 × n, номер строки в таблице строк);
+            таблица строк: смещения (uint64 × (m + 1)) и строки в UTF-8.
+        Одинаковые строки (например, авторы) хранятся один раз. Файл читается
+        через mmap, колонки не копируются и не разбираются целиком. Читаются и
+        файлы прежних версий формата: LIBRBIN1 — без следующего ID, LIBRBIN2 —
+        без зарезервированных блоков, LIBRBIN3 — без номера ревизии.
+    """
+    MAGIC = b"LIBRBIN4"
+    _HEADER = struct.Struct("<8sQQQQQ")
+    _MAGIC_V3 = b"LIBRBIN3"
+    _HEADER_V3 = struct.Struct("<8sQQQQ")
+    _MAGIC_V2 = b"LIBRBIN2"
+    _HEADER_V2 = struct.Struct("<8sQQQ")
+    _MAGIC_V1 = b"LIBRBIN1"
+    _HEADER_V1 = struct.Struct("<8sQQ")
+    _STATUSES = list(BookStatus)
+
+    @staticmethod
+    def _pad(size: int) -> int:
+        return -size % 8
+
+    @staticmethod
+    def _to_bytes(column: array) -> bytes:
+        if sys.byteorder != "little":
+            column = array(column.typecode, column)
+            column.byteswap()
+        return column.tobytes()
+
+    def save(self, file_path: str, books: Iterable[Book], next_id: Optional[int] = None,
+             reserved: Sequence[Sequence[int]] = (), revision: int = 0) -> None:
+        strings: Dict[str, int] = {} # Таблица строк: строка -> номер
+        ids, years, statuses = array("q"), array("q"), bytearray()
+        titles, authors = array("I"), array("I")
+        for book in books:
+            ids.append(book.id)
+            years.append(book.year)
+            statuses.append(self._STATUSES.index(book.status))
+            titles.append(strings.setdefault(book.title, len(strings)))
+            authors.append(strings.setdefault(book.author, len(strings)))
+        encoded = [string.encode("utf-8") for string in strings]
+        offsets = array("Q", [0])
+        for data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        with open(file_path, "wb") as file:
+            file.write(self._HEADER.pack(self.MAGIC, len(ids), len(encoded), next_id or 0, len(reserved), revision))
+            blocks = array("q", [bound for block in reserved for bound in block])
+            for column in (self._to_bytes(blocks), self._to_bytes(ids), self._to_bytes(years), bytes(statuses),
+                           self._to_bytes(titles), self._to_bytes(authors), self._to_bytes(offsets)):
+                file.write(column)
+                file.write(b"\0" * self._pad(len(column)))
+            file.write(b"".join(encoded))
+
+    def iter_books(self, file_path: str, meta: Optional[Dict[str, Any]] = None) -> Iterator[Book]:
+        with open(file_path, "rb") as file:
+            if not file.seek(0, 2): # mmap не открывает пустые файлы
+                raise StorageFormatError(f"Пустой файл {file_path}")
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                columns: List[memoryview] = []
+                try:
+                    yield from self._iter_rows(file_path, view, columns, meta)
+                finally:
+                    for column in columns: # mmap нельзя закрыть, пока есть представления
+                        column.release()
+                    view.release()
+
+    def _iter_rows(self, file_path: str, view: memoryview, columns: List[memoryview],
+                   meta: Optional[Dict[str, Any]]) -> Iterator[Book]:
+        """
+            Чтение строк таблицы из отображённого файла.
+
+            Args:
+                file_path (str): Путь к файлу (для сообщений об ошибках).
+                view (memoryview): Содержимое файла.
+                columns (List[memoryview]): Сюда добавляются открытые колонки,
+                    чтобы вызывающий код освободил их.
+                meta (Optional[Dict[str, Any]]): Сюда записываются next_id,
+                    зарезервированные блоки ID и номер ревизии.
+        """
+        magic = bytes(view[:len(self.MAGIC)])
+        header = {self.MAGIC: self._HEADER, self._MAGIC_V3: self._HEADER_V3, self._MAGIC_V2: self._HEADER_V2,
+                  self._MAGIC_V1: self._HEADER_V1}.get(magic)
+        if header is None or len(view) < header.size:
+            raise StorageFormatError(f"Некорректный бинарный файл {file_path}")
+        _, count, string_count, *rest = header.unpack_from(view)
+        rest += [0] * (3 - len(rest)) # В прежних версиях формата нет next_id, блоков и ревизии
+        next_id, reserved_count, revision = rest
+        pos = header.size
+
+        def column(typecode: str, length: int) -> memoryview:
+            nonlocal pos
+            size = struct.calcsize(typecode) * length
+            if pos + size > len(view):
+                raise StorageFormatError(f"Бинарный файл {file_path} обрезан")
+            data = view[pos:pos + size]
+            columns.append(data)
+            pos += size + self._pad(size)
+            if sys.byteorder != "little": # Колонки записаны в little-endian
+                swapped = array(typecode, data.tobytes())
+                swapped.byteswap()
+                return memoryview(swapped)
+            cast = data.cast(typecode)
+            columns.append(cast)
+            return cast
+
+        if reserved_count: # Колонка блоков есть только в текущей версии формата
+            blocks = column("q", 2 * reserved_count)
+            reserved = [[blocks[index], blocks[index + 1]] for index in range(0, len(blocks), 2)]
+        else:
+            reserved = []
+        if meta is not None:
+            if next_id:
+                meta["next_id"] = next_id
+            if reserved:
+                meta["reserved"] = reserved
+            if revision:
+                meta["revision"] = revision
+        ids, years, statuses = column("q", count), column("q", count), column("B", count)
+        titles, authors = column("I", count), column("I", count)
+        offsets = column("Q", string_count + 1)
+        strings_start = pos
+        if strings_start + offsets[string_count] > len(view):
+            raise StorageFormatError(f"Бинарный файл {file_path} обрезан")
+        cache: Dict[int, str] = {} # Декодированные строки (авторы повторяются)
+
+        def string(number: int) -> str:
+            value = cache.get(number)
+            if value is None:
+                start, end = strings_start + offsets[number], strings_start + offsets[number + 1]
+                value = cache[number] = str(view[start:end], "utf-8")
+            return value
+
+        for row in range(count):
+            try:
+                book = Book(string(titles[row]), string(authors[row]), years[row])
+                book.id = ids[row]
+                book.status = self._STATUSES[statuses[row]]
+            except (IndexError, ValueError) as error: # Номер строки или статуса вне таблицы, неверный UTF-8
+                raise StorageFormatError(f"Некорректная запись книги {row} в бинарном файле {file_path}: "
+                                         f"{error!r}") from error
+            yield book
+
+
+def convert(source_path: str, target_path: str, source: Storage, target: Storage) -> int:
+    """
+        Перевод снимка библиотеки из одного формата в другой.
+
+        Args:
+            source_path (str): Путь к исходному файлу.
+            target_path (str): Путь к новому файлу.
+            source (Storage): Формат исходного файла.
+            target (Storage): Формат нового файла.
+
+        Returns:
+            int: Количество перенесённых книг.
+    """
+    meta: Dict[str, Any] = {}
+    books = source.load(source_path, meta=meta)
+    next_id = meta.get("next_id") or max((book.id for book in books), default=0) + 1
+    target.save(target_path, books, next_id, meta.get("reserved", ()), meta.get("revision", 0))
+    return len(books)
+
+
+def main() -> None:
+    """
+        Конвертер снимков: python storage.py {to-binary,to-json} SOURCE TARGET
+    """
+    parser = argparse.ArgumentParser(description="Конвертация data.json в бинарный формат и обратно.")
+    parser.add_argument("direction", choices=["to-binary", "to-json"])
+    parser.add_argument("source", help="Исходный файл")
+    parser.add_argument("target", help="Новый файл")
+    args = parser.parse_args()
+    if args.direction == "to-binary":
+        count = convert(args.source, args.target, JsonStorage(), BinaryStorage())
+    else:
+        count = convert(args.source, args.target, BinaryStorage(), JsonStorage())
+    print(f"Перенесено книг: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,23 @@
+import asyncio
+import io
+import json
 import unittest
 import os
+import sqlite3
+import threading
+import time
 from pathlib import Path
 
+from async_library import AsyncLibrary
+from instrumentation import Instrumentation
+from journal import Journal
 from library import Library
+from locks import ReadWriteLock
+from main import run_script
+from query import Query
 from book import Book, BookStatus
+from sqlite_library import SqliteLibrary
+from storage import BinaryStorage, JsonStorage, Storage, StorageFormatError, convert
 
 # Подключаем тестируемые классы
 class TestBook(unittest.TestCase):
@@ -49,6 +63,64 @@ class TestBook(unittest.TestCase):
         self.assertEqual(book.year, 1949)
         self.assertEqual(book.status, BookStatus.AVAILABLE)
 
+    def test_book_uses_slots(self):
+        """Тест компактного представления книги без __dict__."""
+        book = Book.from_dict({"id": 1, "title": "1984", "author": "Джордж Оруэлл", "year": 1949})
+        self.assertFalse(hasattr(book, "__dict__"))
+        with self.assertRaises(AttributeError):
+            book.publisher = "Secker & Warburg"  # Неизвестный атрибут
+        self.assertEqual(book.to_dict()["status"], BookStatus.AVAILABLE.value)
+
+class TestReadWriteLock(unittest.TestCase):
+    """
+        Тесты блокировки «читатели-писатель».
+    """
+
+    def test_readers_share_writer_excludes(self):
+        """
+            Тест: читатели держат блокировку одновременно, писатель ждёт их.
+        """
+        lock = ReadWriteLock()
+        both_reading = threading.Barrier(2, timeout=5)
+        events = []
+
+        def reader():
+            with lock.read():
+                both_reading.wait() # Не пройдёт, если читатели исключают друг друга
+                events.append("read")
+
+        def writer():
+            with lock.write():
+                events.append("write")
+
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in readers:
+            thread.start()
+        for thread in readers:
+            thread.join()
+        with lock.read():
+            writer_thread = threading.Thread(target=writer)
+            writer_thread.start()
+            writer_thread.join(0.1)
+            self.assertEqual(events, ["read", "read"]) # Писатель ждёт читателя
+        writer_thread.join()
+        self.assertEqual(events, ["read", "read", "write"])
+
+    def test_reentrant(self):
+        """
+            Тест повторного входа и запрета перехода с чтения на запись.
+        """
+        lock = ReadWriteLock()
+        with lock.write():
+            with lock.write():
+                with lock.read():
+                    pass
+        with lock.read():
+            with lock.read():
+                with self.assertRaises(RuntimeError):
+                    with lock.write():
+                        pass
+
 class TestLibrary(unittest.TestCase):
     """
         Тесты класса Library.
@@ -65,8 +137,11 @@ class TestLibrary(unittest.TestCase):
         """
             Удаляем тестовый файл после каждого теста.
         """
-        if Path(self.library.file_path).exists():
-            os.remove(self.library.file_path)
+        for path in (self.library.file_path, self.library.file_path + ".journal", self.library.file_path + ".lock",
+                     self.library.file_path + ".changes", self.library.file_path + ".ids",
+                     "test_data.bin", "test_data.bin.lock", "test_data.bin.ids"):
+            if Path(path).exists():
+                os.remove(path)
 
     def test_add_book(self):
         """
@@ -106,6 +181,33 @@ class TestLibrary(unittest.TestCase):
         self.assertEqual(len(results), 1)
         self.assertEqual(results[0].author, "Михаил Булгаков")
 
+    def test_search_index_matches_full_scan(self):
+        """
+            Тест совпадения поиска по индексу с полным перебором, в том числе
+            для коротких запросов и после удаления книги.
+        """
+        self.library.add_book("Преступление и наказание", "Фёдор Достоевский", 1866)
+        removed = self.library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        self.library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)
+        self.library.remove_book(removed.id)
+        for field, data in [("title", "и"), ("title", "наказ"), ("author", "фёдор"),
+                            ("year", "186"), ("year", "19"), ("title", ""), ("author", "толстой")]:
+            expected = [book for book in self.library.books if data in str(getattr(book, field)).lower()]
+            self.assertEqual(self.library.search_books(data, field), expected)
+
+    def test_search_normalization(self):
+        """
+            Тест поиска без учёта регистра, различий ё/е и формы записи символов.
+        """
+        hedgehog = self.library.add_book("Ёжик в тумане", "СЕРГЕЙ КОЗЛОВ", 1969)
+        street = self.library.add_book("Straße", "Ｆｒａｎｚ Kafka", 1920)
+        self.assertEqual(self.library.search_books("ежик", "title"), [hedgehog])
+        self.assertEqual(self.library.search_books("ЁЖИК В", "title"), [hedgehog])
+        self.assertEqual(self.library.search_books("strasse", "title"), [street])
+        self.assertEqual(self.library.search_books("franz", "author"), [street])
+        self.assertEqual(list(self.library.iter_search_books("Сергей", "author")), [hedgehog])
+        self.assertEqual(list(self.library.query(author="козлов")), [hedgehog])
+
     def test_save_and_load_data(self):
         """
             Тест сохранения и загрузки данных.
@@ -118,6 +220,947 @@ class TestLibrary(unittest.TestCase):
         self.assertEqual(len(new_library.books), 1)
         self.assertEqual(new_library.books[0].title, "1984")
 
+    def test_get_book(self):
+        """
+            Тест поиска книги по ID через индекс.
+        """
+        book = self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        self.assertIs(self.library.get_book(book.id), book)
+        self.library.remove_book(book.id)
+        self.assertIsNone(self.library.get_book(book.id))
+
+    def test_add_after_remove_keeps_ids_unique(self):
+        """
+            Тест уникальности ID после удаления книги.
+        """
+        first = self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        second = self.library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)
+        self.library.remove_book(first.id)
+        third = self.library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        self.assertNotEqual(third.id, second.id)
+        self.assertIs(self.library.get_book(second.id), second)
+
+    def test_lazy_load(self):
+        """
+            Тест ленивого режима: книги отдаются до окончания чтения файла.
+        """
+        for year in range(1900, 1910):
+            self.library.add_book(f"Книга {year}", "Автор", year)
+        lazy_library = Library(file_path="test_data.json", lazy=True)
+        lazy_library.load_data()
+        first = next(lazy_library.iter_search_books("1900", "year"))
+        self.assertEqual(first.year, 1900)
+        self.assertLess(len(lazy_library._books), 10) # Файл прочитан не полностью
+        self.assertEqual([book.year for book in lazy_library.iter_books()], list(range(1900, 1910)))
+        self.assertEqual(len(lazy_library.search_books("19", "year")), 10)
+
+    def test_batch_operations_save_once(self):
+        """
+            Тест пакетных операций: одно сохранение на пакет.
+        """
+        saves = []
+        original_save = self.library.save_data
+        self.library.save_data = lambda: saves.append(1) or original_save()
+        books = self.library.add_books([("1984", "Джордж Оруэлл", 1949),
+                                        ("Идиот", "Фёдор Достоевский", 1869),
+                                        ("Мастер и Маргарита", "Михаил Булгаков", 1966)])
+        self.assertEqual(len(saves), 1)
+        self.assertTrue(self.library.update_statuses({books[0].id: "выдана", books[1].id: "выдана"}))
+        self.assertFalse(self.library.update_statuses({books[2].id: "выдана", 999: "выдана"}))
+        self.assertEqual(books[2].status, BookStatus.AVAILABLE) # Ничего не изменилось
+        self.assertTrue(self.library.remove_books([books[0].id, books[1].id]))
+        self.assertEqual(len(saves), 3)
+        new_library = Library(file_path="test_data.json")
+        new_library.load_data()
+        self.assertEqual([book.title for book in new_library.books], ["Мастер и Маргарита"])
+
+    def test_batch_rollback(self):
+        """
+            Тест отката пакета при ошибке.
+        """
+        kept = self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        removed = self.library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        with self.assertRaises(RuntimeError):
+            with self.library.batch():
+                self.library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)
+                self.library.update_book_status(kept.id, "выдана")
+                self.library.remove_book(removed.id)
+                raise RuntimeError("сбой импорта")
+        self.assertEqual(self.library.books, [kept, removed])
+        self.assertEqual(kept.status, BookStatus.AVAILABLE)
+        self.assertEqual(self.library.search_books("булгаков", "author"), [])
+        with self.assertRaises(RuntimeError): # Удалённая книга возвращается на своё место
+            with self.library.batch():
+                self.library.remove_book(kept.id)
+                raise RuntimeError("сбой импорта")
+        self.assertEqual(self.library.books, [kept, removed])
+        self.assertEqual(self.library.search_books("оруэлл", "author"), [kept])
+        self.assertEqual(list(self.library.query(status="в наличии")), [kept, removed])
+
+    def test_batch_compaction_failure(self):
+        """
+            Тест сбоя компактизации после записи пакета в журнал: пакет
+            сохранён и не откатывается.
+        """
+        library = Library(file_path="test_data.json", journal=True, compact_every=2)
+        library.load_data()
+        def broken_save(file_path, books, next_id=None, reserved=(), revision=0):
+            raise OSError("Нет места на диске")
+        library.storage.save = broken_save
+        with self.assertLogs("library", "WARNING"):
+            with library.batch():
+                library.add_book("1984", "Джордж Оруэлл", 1949)
+                library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        self.assertEqual([book.title for book in library.books], ["1984", "Идиот"])
+        self.assertEqual([change["op"] for change in library.changes_since(0)], ["add", "add"])
+        reopened = Library(file_path="test_data.json", journal=True)
+        reopened.load_data()
+        self.assertEqual([book.title for book in reopened.books], ["1984", "Идиот"])
+
+    def test_binary_storage(self):
+        """
+            Тест бинарного формата хранения и конвертации из JSON и обратно.
+        """
+        library = Library(file_path="test_data.bin", storage=BinaryStorage())
+        library.add_book("Преступление и наказание", "Фёдор Достоевский", 1866)
+        issued = library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        library.update_book_status(issued.id, "выдана")
+        library.reserve_ids(2)
+        new_library = Library(file_path="test_data.bin", storage=BinaryStorage())
+        new_library.load_data()
+        self.assertEqual([book.to_dict() for book in new_library.books],
+                         [book.to_dict() for book in library.books])
+        self.assertEqual((new_library.next_id, new_library._reserved), (5, [[3, 5]]))
+        self.assertEqual(convert("test_data.bin", "test_data.json", BinaryStorage(), JsonStorage()), 2)
+        self.library.load_data()
+        self.assertEqual([book.to_dict() for book in self.library.books],
+                         [book.to_dict() for book in library.books])
+        os.remove("test_data.bin")
+        convert("test_data.json", "test_data.bin", JsonStorage(), BinaryStorage())
+        new_library.load_data()
+        self.assertEqual(len(new_library.books), 2)
+
+    def test_storage_is_abstract(self):
+        """
+            Тест: формат без iter_books или save нельзя создать.
+        """
+        class LoadOnlyStorage(Storage):
+            def iter_books(self, file_path, meta=None):
+                return iter([])
+
+        with self.assertRaises(TypeError):
+            LoadOnlyStorage()
+
+    def test_corrupted_file_is_not_overwritten(self):
+        """
+            Тест загрузки повреждённого файла в любом формате: ошибка, и
+            мутации не перезаписывают файл неполным каталогом.
+        """
+        for path, storage in [("test_data.json", JsonStorage()), ("test_data.bin", BinaryStorage())]:
+            with open(path, "w", encoding="utf-8") as file:
+                file.write("[{\"id\": 1, ")
+            library = Library(file_path=path, storage=storage)
+            with self.assertRaises(StorageFormatError):
+                library.load_data()
+            with self.assertRaises(StorageFormatError):
+                library.add_book("1984", "Джордж Оруэлл", 1949)
+            with open(path, "r", encoding="utf-8") as file:
+                self.assertEqual(file.read(), "[{\"id\": 1, ")
+
+    def test_corrupted_record_is_not_overwritten(self):
+        """
+            Тест файла с некорректной записью книги (неверный статус, нет
+            автора, номер статуса вне таблицы): ошибка формата, и мутации не
+            перезаписывают файл.
+        """
+        BinaryStorage().save("test_data.bin", [Book.from_dict({"id": 1, "title": "1984", "author": "Джордж Оруэлл",
+                                                               "year": 1949})], 2)
+        with open("test_data.bin", "r+b") as file:
+            file.seek(BinaryStorage._HEADER.size + 16) # Колонка статусов после id и year
+            file.write(bytes([99]))
+        cases = [("test_data.json", JsonStorage(), lazy,
+                  '[{"id": 1, "title": "1984", "author": "Джордж Оруэлл", "year": 1949, "status": "bad-status"}]')
+                 for lazy in (False, True)]
+        cases.append(("test_data.json", JsonStorage(), False, '[{"id": 1, "title": "1984", "year": 1949}]'))
+        cases.append(("test_data.bin", BinaryStorage(), False, None))
+        for path, storage, lazy, content in cases:
+            if content is not None:
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(content)
+            with open(path, "rb") as file:
+                original = file.read()
+            library = Library(file_path=path, storage=storage, lazy=lazy)
+            with self.assertRaises(StorageFormatError):
+                library.load_data()
+                list(library.iter_books())
+            with self.assertRaises(StorageFormatError):
+                library.add_book("Идиот", "Фёдор Достоевский", 1869)
+            with open(path, "rb") as file:
+                self.assertEqual(file.read(), original)
+
+    def test_corrupted_file_lazy(self):
+        """
+            Тест ленивой загрузки повреждённого файла: прочитанные книги
+            доступны, но сохранить неполный каталог нельзя.
+        """
+        damaged = ('[{"id": 1, "title": "1984", "author": "Джордж Оруэлл", "year": 1949, "status": "в наличии"}, '
+                   '{"id": 2, "title": "Иди')
+        with open("test_data.json", "w", encoding="utf-8") as file:
+            file.write(damaged)
+        library = Library(file_path="test_data.json", lazy=True)
+        library.load_data()
+        books = library.iter_books()
+        self.assertEqual(next(books).title, "1984")
+        with self.assertRaises(StorageFormatError):
+            next(books)
+        with self.assertRaises(StorageFormatError):
+            library.remove_book(1)
+        with self.assertRaises(StorageFormatError):
+            library.save_data()
+        with open("test_data.json", "r", encoding="utf-8") as file:
+            self.assertEqual(file.read(), damaged)
+
+    def test_writers_from_two_instances_are_not_lost(self):
+        """
+            Тест записи из двух экземпляров (как из двух процессов) в один файл.
+        """
+        other = Library(file_path="test_data.json")
+        other.load_data()
+        self.library.load_data()
+        self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        other.add_book("Идиот", "Фёдор Достоевский", 1869) # other перечитывает файл перед записью
+        new_library = Library(file_path="test_data.json")
+        new_library.load_data()
+        self.assertEqual(sorted(book.title for book in new_library.books), ["1984", "Идиот"])
+        self.assertEqual(len({book.id for book in new_library.books}), 2)
+
+    def test_unsaved_mutations_survive_other_writer(self):
+        """
+            Тест отложенных мутаций (autosave=False) при изменении файла другим
+            экземпляром: flush не затирает чужие изменения, а ID несохранённых
+            книг не меняются и не выдаются другому экземпляру.
+        """
+        first = Library(file_path="test_data.json", autosave=False)
+        first.load_data()
+        shared = first.add_book("1984", "Джордж Оруэлл", 1949)
+        first.flush()
+        pending = first.add_book("Идиот", "Фёдор Достоевский", 1869)
+        first.update_book_status(pending.id, "выдана")
+        first.remove_book(shared.id)
+        second = Library(file_path="test_data.json")
+        second.load_data()
+        second.add_book("Бесы", "Фёдор Достоевский", 1872)
+        second.update_book_status(shared.id, "выдана")
+        first.flush()
+        self.assertEqual(first.get_book(pending.id).title, "Идиот")
+        reloaded = Library(file_path="test_data.json")
+        reloaded.load_data()
+        self.assertEqual([(book.id, book.title, book.status.value) for book in reloaded.books],
+                         [(3, "Бесы", "в наличии"), (2, "Идиот", "выдана")])
+        self.assertEqual(reloaded.next_id, 4)
+
+    def test_unsaved_ids_are_not_reassigned(self):
+        """
+            Тест ID несохранённых книг (autosave=False): другой экземпляр не
+            выдаёт тот же ID, а ID, возвращённый add_book, после flush
+            указывает на ту же книгу.
+        """
+        first = Library(file_path="test_data.json", autosave=False)
+        first.load_data()
+        pending = first.add_book("1984", "Джордж Оруэлл", 1949)
+        second = Library(file_path="test_data.json")
+        second.load_data()
+        other = second.add_book("Идиот", "Фёдор Достоевский", 1869)
+        self.assertNotEqual(other.id, pending.id)
+        with first.batch(): # В пакете граница ID записывается при его завершении
+            first.add_book("Бесы", "Фёдор Достоевский", 1872)
+        self.assertEqual(second.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966).id, 4)
+        first.flush()
+        self.assertEqual(first.get_book(pending.id).title, "1984")
+        self.assertEqual(first.get_book(other.id).title, "Идиот")
+
+    def test_failed_save_keeps_old_file(self):
+        """
+            Тест атомарной записи: сбой во время записи не портит файл.
+        """
+        self.library.add_book("1984", "Джордж Оруэлл", 1949)
+
+        def broken_save(file_path, books, next_id=None, reserved=(), revision=0):
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write("[{")
+            raise OSError("диск заполнен")
+
+        self.library.storage.save = broken_save
+        with self.assertRaises(OSError):
+            self.library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        new_library = Library(file_path="test_data.json")
+        new_library.load_data()
+        self.assertEqual([book.title for book in new_library.books], ["1984"])
+        self.assertEqual([path for path in os.listdir(".") if path.endswith(".tmp")], [])
+
+    def test_journal_mode(self):
+        """
+            Тест режима журнала: мутации дописываются в журнал и
+            применяются при загрузке поверх снимка.
+        """
+        library = Library(file_path="test_data.json", journal=True)
+        first = library.add_book("1984", "Джордж Оруэлл", 1949)
+        library.save_data() # Снимок с одной книгой, журнал пуст
+        second = library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)
+        library.update_book_status(second.id, "выдана")
+        library.remove_book(first.id)
+        self.assertEqual(library.journal.size, 3)
+        new_library = Library(file_path="test_data.json", journal=True)
+        new_library.load_data()
+        self.assertEqual([book.title for book in new_library.books], ["Мастер и Маргарита"])
+        self.assertEqual(new_library.books[0].status, BookStatus.ISSUED)
+
+    def test_journal_torn_tail(self):
+        """
+            Тест оборванной последней записи журнала: она обрезается, и
+            следующие записи не теряются.
+        """
+        library = Library(file_path="test_data.json", journal=True)
+        library.add_book("1984", "Джордж Оруэлл", 1949)
+        with open(library.journal.path, "ab") as file:
+            file.write(b'{"op": "add", "book": {"id": 2, "ti') # Сбой во время записи
+        new_library = Library(file_path="test_data.json", journal=True)
+        new_library.load_data()
+        new_library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        with open(library.journal.path, "ab") as file:
+            file.write(b'{"op": "remo') # Обрыв без последующего чтения журнала
+        Journal(library.journal.path).append([{"op": "add", "book": {"id": 3, "title": "Бесы",
+                                                                     "author": "Фёдор Достоевский", "year": 1872}}])
+        reloaded = Library(file_path="test_data.json", journal=True)
+        reloaded.load_data()
+        self.assertEqual([book.title for book in reloaded.books], ["1984", "Идиот", "Бесы"])
+
+    def test_journal_compaction(self):
+        """
+            Тест компактизации журнала в снимок.
+        """
+        library = Library(file_path="test_data.json", journal=True, compact_every=2)
+        library.add_book("1984", "Джордж Оруэлл", 1949)
+        library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)
+        self.assertEqual(library.journal.size, 0)
+        plain_library = Library(file_path="test_data.json") # Снимок читается и без журнала
+        plain_library.load_data()
+        self.assertEqual(len(plain_library.books), 2)
+
+
+    def test_search_cache(self):
+        """
+            Тест кэша результатов поиска и его сброса при изменениях.
+        """
+        book = self.library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)
+        self.assertEqual(self.library.search_books("булгаков", "author"), [book])
+        found = self.library.search_books("булгаков", "author")
+        found.clear() # Изменение результата не портит кэш
+        self.assertEqual(self.library.search_books("булгаков", "author"), [book])
+        self.assertEqual(self.library.search_cache.stats()["hits"], 2)
+        self.library.update_book_status(book.id, "выдана") # Поиск по автору не сбрасывается
+        self.assertEqual(self.library.search_books("булгаков", "author"), [book])
+        self.assertEqual(self.library.search_cache.stats()["hits"], 3)
+        second = self.library.add_book("Собачье сердце", "Михаил Булгаков", 1925)
+        self.assertEqual(self.library.search_books("булгаков", "author"), [book, second])
+        self.library.remove_book(book.id)
+        self.assertEqual(self.library.search_books("булгаков", "author"), [second])
+        self.assertEqual(self.library.search_cache.stats()["misses"], 3)
+
+    def test_search_cache_status_and_size(self):
+        """
+            Тест сброса поиска по статусу и вытеснения старых запросов.
+        """
+        library = Library(file_path="test_data.json", search_cache_size=1)
+        book = library.add_book("1984", "Джордж Оруэлл", 1949)
+        self.assertEqual(library.search_books("issued", "status"), [])
+        library.update_book_status(book.id, "выдана")
+        self.assertEqual(library.search_books("issued", "status"), [book])
+        library.search_books("1949", "year")
+        self.assertEqual(library.search_cache.stats()["evictions"], 1)
+        self.assertEqual(library.search_cache.stats()["size"], 1)
+
+    def test_query(self):
+        """
+            Тест запроса из нескольких условий с сортировкой и страницами.
+        """
+        for year in (1869, 1866, 1880, 1966, 1925):
+            self.library.add_book(f"Книга {year}", "Фёдор Достоевский" if year < 1900 else "Михаил Булгаков", year)
+        self.library.update_book_status(2, "выдана")
+        query = Query(author="достоевский", year_from=1860, year_to=1870, order_by="year")
+        self.assertEqual([book.year for book in self.library.query(query)], [1866, 1869])
+        self.assertEqual(self.library.explain(query), ("year", 2))
+        self.assertEqual([book.id for book in self.library.query(status="выдана")], [2])
+        self.assertEqual(self.library.explain(Query(title="Книга 1966", year_from=1800))[0], "title")
+        page = Query(order_by="year", descending=True, limit=2)
+        self.assertEqual([book.year for book in self.library.query(page)], [1966, 1925])
+        self.assertEqual([book.year for book in self.library.query(page.next_page())], [1880, 1869])
+        self.library.remove_book(4)
+        self.assertEqual([book.year for book in self.library.query(year_from=1900)], [1925])
+        with self.assertRaises(ValueError):
+            Query(order_by="status")
+
+    def test_parallel_mode(self):
+        """
+            Тест параллельного режима: результаты совпадают с поиском в одном
+            процессе, триграммы этого процесса строятся только при изменении.
+        """
+        books = [Book(f"Книга {number}", ["Лев Толстой", "Фёдор Достоевский", "Антон Чехов"][number % 3],
+                      1850 + number) for number in range(30)]
+        for number, book in enumerate(books, start=1):
+            book.id = number
+        library = Library(file_path="test_data.json", workers=2)
+        self.addCleanup(library.close)
+        library.books = books
+        self.library.books = books
+        self.assertEqual(library._shards_generation, library._generation) # Каталог разделён между процессами
+        self.assertEqual(library._search_index["author"].key(1), None) # Триграммы только в процессах пула
+        answered = [] # Результаты процессов пула (None — поиск в этом процессе)
+        shard_search = library._shards.search
+        library._shards.search = lambda field, key: answered.append(shard_search(field, key)) or answered[-1]
+        for field, data in [("author", "толстой"), ("title", "книга 1"), ("year", "18"), ("title", "")]:
+            self.assertEqual(library.search_books(data, field), self.library.search_books(data, field))
+        self.assertEqual(len(answered), 4)
+        self.assertNotIn(None, answered)
+        added = library.add_book("Война и мир", "Лев Толстой", 1869) # После изменения поиск идёт в этом процессе
+        self.assertIn(added, library.search_books("толстой", "author"))
+        self.assertEqual(library.search_books("книга 2", "title"), self.library.search_books("книга 2", "title"))
+        self.assertEqual(list(library.query(author="чехов")), list(self.library.query(author="чехов")))
+        self.assertEqual(len(answered), 4)
+        library.reshard()
+        self.assertEqual(library._shards_generation, library._generation)
+        self.assertEqual(library.search_books("война", "title"), [added])
+        self.assertEqual(answered[-1], [added.id])
+
+    def test_ids_not_reused_after_remove(self):
+        """
+            Тест монотонных ID: ID удалённой книги не выдаётся повторно, в том
+            числе после перезагрузки файла.
+        """
+        self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        last = self.library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)
+        self.library.remove_book(last.id)
+        self.assertEqual(self.library.add_book("Идиот", "Фёдор Достоевский", 1869).id, 3)
+        self.library.remove_book(3)
+        new_library = Library(file_path="test_data.json")
+        new_library.load_data()
+        self.assertEqual(new_library.next_id, 4)
+        self.assertEqual(new_library.add_book("Война и мир", "Лев Толстой", 1869).id, 4)
+
+    def test_reserve_ids(self):
+        """
+            Тест резервирования блока ID в режиме журнала.
+        """
+        library = Library(file_path="test_data.json", journal=True)
+        library.add_book("1984", "Джордж Оруэлл", 1949)
+        reserved = library.reserve_ids(3)
+        self.assertEqual(reserved, range(2, 5))
+        self.assertEqual(library.add_book("Идиот", "Фёдор Достоевский", 1869).id, 5)
+        self.assertEqual(library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=3).id, 3)
+        with self.assertRaises(ValueError):
+            library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=3)
+        with self.assertRaises(ValueError):
+            library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=6)
+        removed = library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=4)
+        library.remove_book(removed.id)
+        with self.assertRaises(ValueError): # ID удалённой книги не выдаётся повторно
+            library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=removed.id)
+        for journal in (True, False): # Незанятый ID 2 сохраняется в журнале и в снимке
+            new_library = Library(file_path="test_data.json", journal=journal)
+            new_library.load_data()
+            self.assertEqual(new_library.next_id, 6)
+            with self.assertRaises(ValueError):
+                new_library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=4)
+            library.save_data()
+        with self.assertRaises(RuntimeError): # Откат пакета возвращает ID в блок
+            with new_library.batch():
+                new_library.add_book("Идиот", "Фёдор Достоевский", 1869, book_id=2)
+                raise RuntimeError("сбой импорта")
+        self.assertEqual(new_library.add_book("Идиот", "Фёдор Достоевский", 1869, book_id=2).id, 2)
+
+    def test_reserve_ids_from_two_writers(self):
+        """
+            Тест резервирования блоков двумя экземплярами с отложенным
+            сохранением: блоки не пересекаются, каждый сохраняет свой блок
+            после записи другого, откат пакета снимает блок.
+        """
+        first = Library(file_path="test_data.json", autosave=False)
+        first.load_data()
+        second = Library(file_path="test_data.json", autosave=False)
+        second.load_data()
+        with first.batch():
+            mine = first.reserve_ids(3)
+        theirs = second.reserve_ids(3)
+        self.assertEqual((mine, theirs), (range(1, 4), range(4, 7)))
+        second.add_book("Идиот", "Фёдор Достоевский", 1869, book_id=4)
+        second.flush()
+        self.assertEqual(first.add_book("1984", "Джордж Оруэлл", 1949, book_id=1).id, 1)
+        first.flush()
+        with self.assertRaises(RuntimeError):
+            with first.batch():
+                dropped = first.reserve_ids(2)
+                raise RuntimeError("сбой импорта")
+        with self.assertRaises(ValueError):
+            first.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=dropped[0])
+        self.assertEqual(second.reserve_ids(1), range(9, 10)) # ID снятого блока не выдаются
+        second.flush()
+        reloaded = Library(file_path="test_data.json")
+        reloaded.load_data()
+        self.assertEqual([book.id for book in reloaded.books], [4, 1])
+        self.assertEqual(reloaded._reserved, [[2, 4], [5, 7], [9, 10]])
+
+    def test_load_legacy_array_file(self):
+        """
+            Тест чтения файла старого формата (массив книг без next_id).
+        """
+        with open("test_data.json", "w", encoding="utf-8") as file:
+            json.dump([{"id": 5, "title": "1984", "author": "Джордж Оруэлл", "year": 1949, "status": "в наличии"}],
+                      file)
+        for lazy in (False, True):
+            library = Library(file_path="test_data.json", lazy=lazy)
+            library.load_data()
+            self.assertEqual(library.add_book("Идиот", "Фёдор Достоевский", 1869).id, 6)
+            with open("test_data.json", "r", encoding="utf-8") as file:
+                self.assertEqual(json.load(file)["next_id"], 7)
+            os.remove("test_data.json")
+            with open("test_data.json", "w", encoding="utf-8") as file:
+                json.dump([{"id": 5, "title": "1984", "author": "Джордж Оруэлл", "year": 1949}], file)
+
+    def test_changes_since(self):
+        """
+            Тест ленты изменений: ревизии по порядку, ограничение размера,
+            откат пакета не попадает в ленту.
+        """
+        library = Library(file_path="test_data.json", change_feed_size=3)
+        library.load_data()
+        start = library.revision
+        book = library.add_book("1984", "Джордж Оруэлл", 1949)
+        library.update_book_status(book.id, "выдана")
+        library.remove_book(book.id)
+        changes = library.changes_since(start)
+        self.assertEqual([change["op"] for change in changes], ["add", "status", "remove"])
+        self.assertEqual([change["revision"] for change in changes], [start + 1, start + 2, start + 3])
+        self.assertEqual(changes[0]["book"]["title"], "1984")
+        self.assertEqual(library.changes_since(start + 2), [{"revision": start + 3, "op": "remove", "id": book.id}])
+        self.assertEqual(library.changes_since(library.revision), [])
+        with self.assertRaises(ValueError):
+            library.changes_since(library.revision + 1)
+        with self.assertRaises(RuntimeError):
+            with library.batch():
+                library.add_book("Идиот", "Фёдор Достоевский", 1869)
+                raise RuntimeError
+        self.assertEqual(library.revision, start + 3)
+        library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        with self.assertRaises(ValueError): # Первое изменение вытеснено из ленты
+            library.changes_since(start)
+        self.assertEqual(len(library.changes_since(start + 1)), 3)
+
+    def test_change_feed_persistence(self):
+        """
+            Тест ленты изменений в файле: ревизии переживают перезапуск, а
+            изменения другого процесса прерывают историю.
+        """
+        library = Library(file_path="test_data.json", change_feed_path="test_data.json.changes")
+        library.load_data()
+        library.add_book("1984", "Джордж Оруэлл", 1949)
+        library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        reopened = Library(file_path="test_data.json", change_feed_path="test_data.json.changes")
+        reopened.load_data()
+        self.assertEqual(reopened.revision, 2)
+        self.assertEqual([change["book"]["id"] for change in reopened.changes_since(0)], [1, 2])
+        other = Library(file_path="test_data.json")
+        other.load_data()
+        other.remove_book(1) # Изменение другого экземпляра (процесса) без общей ленты
+        reopened.update_book_status(2, "выдана") # Данные перечитываются перед изменением
+        with self.assertRaises(ValueError):
+            reopened.changes_since(2)
+        self.assertEqual([change["op"] for change in reopened.changes_since(reopened.revision - 1)], ["status"])
+
+    def test_change_feed_shared_file(self):
+        """
+            Тест ленты изменений в общем файле двух экземпляров: ревизии не
+            повторяются, оборванная строка обрезается, перечитывание данных
+            не прерывает общую историю.
+        """
+        first = Library(file_path="test_data.json", change_feed_path="test_data.json.changes")
+        first.load_data()
+        second = Library(file_path="test_data.json", change_feed_path="test_data.json.changes")
+        second.load_data()
+        first.add_book("1984", "Джордж Оруэлл", 1949)
+        with open("test_data.json.changes", "ab") as file:
+            file.write(b'{"revision": 2, "op": "st') # Сбой во время записи
+        second.add_book("Идиот", "Фёдор Достоевский", 1869) # Перечитывает данные: лента уже содержит их изменения
+        first.add_book("Бесы", "Фёдор Достоевский", 1872)
+        with open("test_data.json.changes", "r", encoding="utf-8") as file:
+            changes = [json.loads(line) for line in file]
+        self.assertEqual([(change["revision"], change["op"]) for change in changes],
+                         [(1, "add"), (2, "add"), (3, "add")])
+        self.assertEqual([change["book"]["title"] for change in second.changes_since(0)],
+                         ["1984", "Идиот", "Бесы"])
+
+    def test_change_feed_revision_survives_restart(self):
+        """
+            Тест ревизии данных без файла ленты: после перезапуска ревизии
+            продолжаются, а не начинаются с нуля, и старая ревизия
+            потребителя не совпадает с другими данными.
+        """
+        library = Library(file_path="test_data.json")
+        library.load_data()
+        library.add_book("1984", "Джордж Оруэлл", 1949)
+        library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        restarted = Library(file_path="test_data.json")
+        restarted.load_data()
+        self.assertEqual(restarted.revision, 2)
+        with self.assertRaises(ValueError):
+            restarted.changes_since(1) # Изменений до перезапуска в памяти нет
+        restarted.remove_book(1)
+        self.assertEqual([change["op"] for change in restarted.changes_since(2)], ["remove"])
+
+    def test_change_feed_write_failure(self):
+        """
+            Тест сбоя записи ленты изменений: сохранённые данные не
+            откатываются, история ленты прерывается.
+        """
+        library = Library(file_path="test_data.json", change_feed_path="test_data.json.changes")
+        library.load_data()
+        start = library.revision
+        def broken_write(changes):
+            raise OSError("Нет места на диске")
+        library.change_feed._write = broken_write
+        with self.assertLogs("library", "WARNING"):
+            with library.batch():
+                library.add_book("1984", "Джордж Оруэлл", 1949)
+                library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        self.assertEqual(len(library.books), 2)
+        reopened = Library(file_path="test_data.json")
+        reopened.load_data()
+        self.assertEqual([book.title for book in reopened.books], ["1984", "Идиот"])
+        with self.assertRaises(ValueError):
+            library.changes_since(start)
+        self.assertEqual(library.changes_since(library.revision), [])
+
+    def test_instrumentation(self):
+        """
+            Тест статистики горячих путей: счётчики, гистограммы и приёмник событий.
+        """
+        events = []
+        instrumentation = Instrumentation(sink=events.append)
+        library = Library(file_path="test_data.json", instrumentation=instrumentation)
+        library.add_book("1984", "Джордж Оруэлл", 1949)
+        library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)
+        self.assertEqual(len(library.search_books("мастер", "title")), 1)
+        library.load_data()
+        stats = instrumentation.snapshot()
+        self.assertEqual(stats["counters"]["add_book"]["calls"], 2)
+        self.assertEqual(stats["counters"]["save_data"]["calls"], 2)
+        self.assertEqual(stats["counters"]["save_data"]["bytes_written"],
+                         sum(event["bytes_written"] for event in events if event["operation"] == "save_data"))
+        self.assertEqual(stats["counters"]["search_books"]["books_scanned"], 1)
+        self.assertEqual(stats["counters"]["load_data"]["books_loaded"], 2)
+        for name in ("load_data.parse_seconds", "load_data.build_seconds", "load_data.index_seconds"):
+            self.assertEqual(stats["histograms"][name]["count"], 1)
+        self.assertEqual(stats["histograms"]["search_books"]["count"], 1)
+        self.assertEqual([event["operation"] for event in events][:2], ["save_data", "add_book"])
+
+    def test_instrumentation_profile(self):
+        """
+            Тест профилирования операций через cProfile.
+        """
+        instrumentation = Instrumentation(profile=True)
+        library = Library(file_path="test_data.json", instrumentation=instrumentation)
+        library.add_book("1984", "Джордж Оруэлл", 1949)
+        stats = instrumentation.profile_stats()
+        self.assertIsNotNone(stats)
+        self.assertTrue(any(function[2] == "save_data" for function in stats.stats))
+        instrumentation.reset()
+        self.assertIsNone(instrumentation.profile_stats())
+        self.assertEqual(instrumentation.snapshot()["counters"], {})
+
+
+class TestScriptMode(unittest.TestCase):
+    """
+        Тесты неинтерактивного режима main.py (поток JSON-команд).
+    """
+    def setUp(self):
+        self.library = Library(file_path="test_data.json", autosave=False)
+        self.library.load_data()
+
+    def tearDown(self):
+        for path in ("test_data.json", "test_data.json.lock", "test_data.json.ids"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def run_lines(self, lines, flush_every=0):
+        output = io.StringIO()
+        success = run_script(self.library, lines, output, flush_every)
+        return success, [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_script_commands(self):
+        """
+            Тест выполнения команд: по строке результата на команду, ошибки не
+            прерывают поток, мутации сохраняются в конце.
+        """
+        success, results = self.run_lines([
+            '{"op": "add", "title": "Идиот", "author": "Фёдор Достоевский", "year": 1869}',
+            '',
+            '{"op": "status", "id": 1, "status": "выдана"}',
+            'не JSON',
+            '{"op": "remove", "id": 5}',
+            '{"op": "search", "field": "author", "query": "достоевскии"}',
+            '{"op": "search", "field": "author", "query": "достоевский"}',
+        ])
+        self.assertFalse(success)
+        self.assertEqual([result["ok"] for result in results], [True, True, False, False, True, True])
+        self.assertEqual(results[0]["book"]["id"], 1)
+        self.assertEqual(results[4]["books"], [])
+        self.assertEqual(results[5]["books"][0]["status"], "выдана")
+        self.assertEqual(self.library.unsaved, 0)
+        new_library = Library(file_path="test_data.json")
+        new_library.load_data()
+        self.assertEqual(new_library.get_book(1).status, BookStatus.ISSUED)
+
+    def test_script_flush_every(self):
+        """
+            Тест сохранения через каждые N мутаций.
+        """
+        saves = []
+        save_data = self.library.save_data
+        self.library.save_data = lambda: (saves.append(self.library.unsaved), save_data())
+        lines = [json.dumps({"op": "add", "title": f"Книга {number}", "author": "Автор", "year": 2000})
+                 for number in range(5)]
+        success, results = self.run_lines(lines + ['{"op": "list"}'], flush_every=2)
+        self.assertTrue(success)
+        self.assertEqual(len(saves), 3) # После 2-й и 4-й мутации и в конце
+        self.assertEqual(len(results[-1]["books"]), 5)
+
+class TestSqliteLibrary(unittest.TestCase):
+    """
+        Тесты класса SqliteLibrary.
+    """
+
+    def setUp(self):
+        """
+            Создаём тестовую базу перед каждым тестом.
+        """
+        self.library = SqliteLibrary(file_path="test_data.db")
+        self.library.load_data()
+
+    def tearDown(self):
+        """
+            Удаляем файлы тестовой базы после каждого теста.
+        """
+        self.library.close()
+        for suffix in ("", "-wal", "-shm"):
+            if Path(self.library.file_path + suffix).exists():
+                os.remove(self.library.file_path + suffix)
+        if Path("test_data.json.lock").exists(): # Блокировка эталонной Library
+            os.remove("test_data.json.lock")
+
+    def test_add_update_remove(self):
+        """
+            Тест добавления, изменения статуса и удаления книги.
+        """
+        book = self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        self.assertTrue(self.library.update_book_status(book.id, "выдана"))
+        self.assertFalse(self.library.update_book_status(book.id, "недоступна"))
+        self.library.close()
+        self.assertEqual(self.library.get_book(book.id).status, BookStatus.ISSUED) # Данные в базе после переоткрытия
+        self.assertTrue(self.library.remove_book(book.id))
+        self.assertFalse(self.library.remove_book(book.id))
+        self.assertEqual(self.library.books, [])
+
+    def test_search_matches_library(self):
+        """
+            Тест совпадения поиска в SQL с поиском Library.
+        """
+        reference = Library(file_path="test_data.json") # Без записи на диск
+        books = [self.library.add_book("Преступление и наказание", "Фёдор Достоевский", 1866),
+                 self.library.add_book("Идиот", "Фёдор Достоевский", 1869),
+                 self.library.add_book("Мастер и Маргарита", "Михаил Булгаков", 1966)]
+        reference.books = books
+        for field, data in [("title", "и"), ("title", "наказ"), ("author", "фёдор"),
+                            ("year", "186"), ("title", ""), ("author", "толстой")]:
+            self.assertEqual([book.id for book in self.library.search_books(data, field)],
+                             [book.id for book in reference.search_books(data, field)])
+
+    def test_batch_rollback(self):
+        """
+            Тест отката пакета в транзакции.
+        """
+        book = self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        with self.assertRaises(RuntimeError):
+            with self.library.batch():
+                self.library.add_book("Идиот", "Фёдор Достоевский", 1869)
+                self.library.remove_book(book.id)
+                raise RuntimeError("сбой импорта")
+        self.assertEqual([b.title for b in self.library.books], ["1984"])
+
+    def test_failed_mutation_is_rolled_back(self):
+        """
+            Тест отката изменения с ошибкой: вне пакета транзакция не остаётся
+            открытой, внутри пакета откатывается только это изменение.
+        """
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.library.add_book(None, "Джордж Оруэлл", 1949)
+        self.assertFalse(self.library._connection.in_transaction) # База не заблокирована для других процессов
+        self.assertEqual(self.library.next_id, 1)
+        with self.library.batch():
+            self.library.add_book("1984", "Джордж Оруэлл", 1949)
+            with self.assertRaises(sqlite3.IntegrityError):
+                self.library.add_book(None, "Фёдор Достоевский", 1869)
+        self.assertEqual([book.id for book in self.library.books], [1])
+        self.assertEqual(self.library.next_id, 2)
+
+
+    def test_batches_from_two_threads(self):
+        """
+            Тест: пакет другого потока не считается вложенным, и обе
+            транзакции фиксируются.
+        """
+        started, release = threading.Event(), threading.Event()
+
+        def first():
+            with self.library.batch():
+                self.library.add_book("1984", "Джордж Оруэлл", 1949)
+                started.set()
+                release.wait(5)
+
+        def second():
+            started.wait(5)
+            with self.library.batch():
+                self.library.add_book("Идиот", "Фёдор Достоевский", 1869)
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        time.sleep(0.1) # Второй поток успевает начать пакет
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.library._batch_depth, 0)
+        other = SqliteLibrary(file_path="test_data.db") # Транзакция не осталась открытой
+        other.add_book("Бесы", "Фёдор Достоевский", 1872)
+        self.assertEqual(len(other.books), 3)
+        other.close()
+
+    def test_query(self):
+        """
+            Тест запроса из нескольких условий запросом к базе.
+        """
+        for year in (1869, 1866, 1880, 1966):
+            self.library.add_book(f"Книга {year}", "Фёдор Достоевский" if year < 1900 else "Михаил Булгаков", year)
+        self.library.update_book_status(2, "выдана")
+        query = Query(author="достоевский", year_to=1875, order_by="year", descending=True)
+        self.assertEqual([book.year for book in self.library.query(query)], [1869, 1866])
+        self.assertEqual(self.library.explain(query)[1], 2)
+        self.assertEqual([book.id for book in self.library.query(status="выдана")], [2])
+        self.assertEqual([book.id for book in self.library.query(offset=1, limit=2)], [2, 3])
+
+    def test_search_keys_rebuilt_for_old_database(self):
+        """
+            Тест пересчёта ключей поиска в базе со старыми ключами (нижний регистр).
+        """
+        book = self.library.add_book("Ёжик в тумане", "Сергей Козлов", 1969)
+        db = self.library._connection
+        db.execute("UPDATE books SET title_key = lower(title)")
+        db.execute("PRAGMA user_version = 0")
+        db.commit()
+        self.library.close()
+        self.library = SqliteLibrary(file_path="test_data.db")
+        self.assertEqual([found.id for found in self.library.search_books("ежик", "title")], [book.id])
+
+    def test_ids_not_reused(self):
+        """
+            Тест монотонных ID в базе: ID удалённой книги не выдаётся повторно.
+        """
+        first = self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        self.library.remove_book(first.id)
+        self.assertEqual(self.library.reserve_ids(2), range(2, 4))
+        self.assertEqual(self.library.add_book("Идиот", "Фёдор Достоевский", 1869).id, 4)
+        self.assertEqual(self.library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=2).id, 2)
+        with self.assertRaises(ValueError):
+            self.library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=2)
+        with self.assertRaises(ValueError): # ID удалённой книги не зарезервирован
+            self.library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=first.id)
+        self.library.close()
+        self.assertEqual(self.library.add_book("Бесы", "Фёдор Достоевский", 1872, book_id=3).id, 3)
+
+    def test_changes_since(self):
+        """
+            Тест ленты изменений в базе: изменения записываются в той же
+            транзакции, откат пакета их отменяет, ревизии видны другому
+            соединению.
+        """
+        self.library.close()
+        self.library = SqliteLibrary(file_path="test_data.db", change_feed_size=3)
+        start = self.library.revision
+        book = self.library.add_book("1984", "Джордж Оруэлл", 1949)
+        self.library.update_book_status(book.id, "выдана")
+        self.assertFalse(self.library.remove_book(book.id + 1))
+        with self.assertRaises(RuntimeError):
+            with self.library.batch():
+                self.library.remove_book(book.id)
+                raise RuntimeError
+        self.library.remove_book(book.id)
+        other = SqliteLibrary(file_path="test_data.db")
+        changes = other.changes_since(start)
+        other.close()
+        self.assertEqual([change["op"] for change in changes], ["add", "status", "remove"])
+        self.assertEqual([change["revision"] for change in changes], [start + 1, start + 2, start + 3])
+        self.assertEqual(changes[0]["book"]["title"], "1984")
+        self.library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        with self.assertRaises(ValueError): # Первое изменение вытеснено из ленты
+            self.library.changes_since(start)
+        self.assertEqual(len(self.library.changes_since(start + 1)), 3)
+        self.library.books = []
+        with self.assertRaises(ValueError):
+            self.library.changes_since(start + 4)
+        self.assertEqual(self.library.changes_since(self.library.revision), [])
+
+class TestAsyncLibrary(unittest.IsolatedAsyncioTestCase):
+    """
+        Тесты класса AsyncLibrary.
+    """
+
+    def tearDown(self):
+        """
+            Удаляем тестовые файлы после каждого теста.
+        """
+        for path in ("test_data.json", "test_data.json.lock", "test_data.json.ids"):
+            if Path(path).exists():
+                os.remove(path)
+
+    async def test_mutations_are_coalesced_into_one_flush(self):
+        """
+            Тест объединения серии мутаций в одно фоновое сохранение.
+        """
+        library = Library(file_path="test_data.json")
+        saves = []
+        original_save = library.save_data
+        library.save_data = lambda: saves.append(1) or original_save()
+        async_library = AsyncLibrary(library, flush_delay=0.05)
+        await async_library.load_data()
+        book = await async_library.add_book("1984", "Джордж Оруэлл", 1949)
+        await async_library.add_book("Идиот", "Фёдор Достоевский", 1869)
+        self.assertTrue(await async_library.update_book_status(book.id, "выдана"))
+        self.assertEqual(len(await async_library.search_books("оруэлл", "author")), 1)
+        self.assertEqual(saves, []) # Ещё ничего не записано
+        await asyncio.sleep(0.2)
+        self.assertEqual(len(saves), 1)
+        self.assertEqual(library.unsaved, 0)
+
+    async def test_flush(self):
+        """
+            Тест немедленного сохранения через flush.
+        """
+        async with AsyncLibrary(Library(file_path="test_data.json"), flush_delay=60) as async_library:
+            await async_library.add_book("1984", "Джордж Оруэлл", 1949)
+            await async_library.flush()
+            new_library = Library(file_path="test_data.json")
+            new_library.load_data()
+            self.assertEqual(len(new_library.books), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
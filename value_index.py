@@ -0,0 +1,124 @@
+import bisect
+from typing import Any, Dict, Hashable, Iterator, List, Optional
+
+
+class ValueIndex:
+    """
+        Индекс точного значения одного поля: значение -> ID книг.
+
+        Для упорядочиваемых значений (например, годов) индекс может хранить
+        отсортированный список различных значений, чтобы выбирать диапазон
+        значений без перебора всех книг.
+
+        Атрибуты:
+            ordered (bool): Хранится ли отсортированный список значений.
+    """
+    def __init__(self, ordered: bool = False):
+        """
+            Инициализация пустого индекса.
+
+            Args:
+                ordered (bool): Поддерживать отсортированный список значений
+                                для запросов по диапазону.
+        """
+        self.ordered = ordered
+        self._postings: Dict[Hashable, Dict[int, None]] = {} # Значение -> ID книг (в порядке добавления)
+        self._values: List[Any] = [] # Различные значения по возрастанию (если ordered)
+
+    def add(self, book_id: int, value: Hashable) -> None:
+        """
+            Добавление книги в индекс.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+                value (Hashable): Значение поля книги.
+        """
+        posting = self._postings.get(value)
+        if posting is None:
+            posting = self._postings[value] = {}
+            if self.ordered:
+                bisect.insort(self._values, value)
+        posting[book_id] = None
+
+    def remove(self, book_id: int, value: Hashable) -> None:
+        """
+            Удаление книги из индекса.
+
+            Args:
+                book_id (int): Уникальный идентификатор книги.
+                value (Hashable): Значение поля книги при добавлении в индекс.
+        """
+        posting = self._postings.get(value)
+        if posting is None or book_id not in posting:
+            return
+        del posting[book_id]
+        if not posting:
+            del self._postings[value]
+            if self.ordered:
+                del self._values[bisect.bisect_left(self._values, value)]
+
+    def clear(self) -> None:
+        """
+            Очистка индекса.
+        """
+        self._postings.clear()
+        self._values.clear()
+
+    def get(self, value: Hashable) -> Dict[int, None]:
+        """
+            Книги с заданным значением.
+
+            Args:
+                value (Hashable): Значение поля.
+
+            Returns:
+                Dict[int, None]: ID книг в порядке добавления (не изменять).
+        """
+        return self._postings.get(value, {})
+
+    def values_between(self, low: Optional[Any] = None, high: Optional[Any] = None,
+                       descending: bool = False) -> List[Any]:
+        """
+            Различные значения из диапазона (для индекса с ordered=True).
+
+            Args:
+                low (Optional[Any]): Нижняя граница включительно или None.
+                high (Optional[Any]): Верхняя граница включительно или None.
+                descending (bool): Вернуть значения по убыванию.
+
+            Returns:
+                List[Any]: Значения по возрастанию (или убыванию).
+        """
+        start = 0 if low is None else bisect.bisect_left(self._values, low)
+        end = len(self._values) if high is None else bisect.bisect_right(self._values, high)
+        values = self._values[start:end]
+        if descending:
+            values.reverse()
+        return values
+
+    def count_between(self, low: Optional[Any] = None, high: Optional[Any] = None) -> int:
+        """
+            Количество книг со значением из диапазона.
+
+            Args:
+                low (Optional[Any]): Нижняя граница включительно или None.
+                high (Optional[Any]): Верхняя граница включительно или None.
+
+            Returns:
+                int: Количество книг.
+        """
+        return sum(len(self._postings[value]) for value in self.values_between(low, high))
+
+    def iter_between(self, low: Optional[Any] = None, high: Optional[Any] = None) -> Iterator[int]:
+        """
+            ID книг со значением из диапазона по возрастанию значения.
+
+            Args:
+                low (Optional[Any]): Нижняя граница включительно или None.
+                high (Optional[Any]): Верхняя граница включительно или None.
+
+            Yields:
+                int: ID очередной книги.
+        """
+        for value in self.values_between(low, high):
+            yield from self._postings[value]